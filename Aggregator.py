@@ -0,0 +1,203 @@
+from datetime import datetime as dt
+from common import HourType
+from config import Config
+from timesheet import TimesheetRow
+
+
+class Aggregator:
+    """Ingests each timesheet row exactly once and keeps the aggregated views shared by all sheet generators:
+
+    - sumbyuser: email -> date -> HourType -> hours
+    - sumprojectactivity: (email, project, activity) -> date -> HourType -> hours
+    - sumprojectmonthly: (email, project, activity) -> (year, month) -> HourType -> hours
+    - sumstandby: (hotline, email, project) -> date -> hours
+    - sumhotline: hotline -> date -> hours
+    - sumworkmonthly: email -> (year, month) -> {"projects", "activities", "work_hours"}
+
+    Along with sumbyuser, the standby limiter's month index is kept:
+
+    - standbymonthly: email -> (year, month) -> standby hours
+    - daysbymonth: email -> (year, month) -> dates of the user's sumbyuser entries, in the order they were first seen
+
+    Hours are integer hundredths of an hour (common.HOUR). The views are read-only, except sumbyuser for the limiter.
+
+    Only the given views are filled (all of them by default), so views no selected sheet reads cost nothing.
+
+    This is the in-memory aggregation backend, SQLiteAggregator keeps the same views in an SQLite database.
+    """
+
+    VIEWS = ("sumbyuser", "sumprojectactivity", "sumprojectmonthly", "sumstandby", "sumhotline", "sumworkmonthly")
+
+    def __init__(self, config: Config, views=VIEWS):
+        self.config = config
+        self.views = set(views)
+        self.doByUser = "sumbyuser" in self.views
+        self.doProjectActivity = "sumprojectactivity" in self.views
+        self.doProjectMonthly = "sumprojectmonthly" in self.views
+        self.doStandby = "sumstandby" in self.views
+        self.doHotline = "sumhotline" in self.views
+        self.doWorkMonthly = "sumworkmonthly" in self.views
+
+        self.users = {}
+        self.approvers = {}
+        self.min_date = dt.max
+        self.max_date = dt.min
+
+        self.sumbyuser = {}
+        self.sumprojectactivity = {}
+        self.sumprojectmonthly = {}
+        self.sumstandby = {}
+        self.sumhotline = {}
+        self.sumworkmonthly = {}
+        self.standbymonthly = {}
+        self.daysbymonth = {}
+
+        # filled by SGStandbyLimiter.limitStandby
+        self.standbyLimited = False
+        self.sumstandbydec = {}
+        self.sumworkinc = {}
+
+    def loadRow(self, row: TimesheetRow):
+        date = row.date
+        email = row.email
+        t = row.hourtype
+        hours = row.hours
+        project = row.label
+        activity = row.activity
+
+        if email not in self.users.keys():
+            self.users[email] = row.user
+        if email not in self.approvers.keys():
+            self.approvers[email] = row.approver
+
+        self.min_date = min(self.min_date, date)
+        self.max_date = max(self.max_date, date)
+
+        # sumbyuser, standbymonthly and daysbymonth update
+        ym = (date.year, date.month)
+        if self.doByUser:
+            if email not in self.sumbyuser.keys():
+                self.sumbyuser[email] = {}
+                self.standbymonthly[email] = {}
+                self.daysbymonth[email] = {}
+            if date not in self.sumbyuser[email].keys():
+                self.sumbyuser[email][date] = {}
+                if ym not in self.daysbymonth[email]:
+                    self.daysbymonth[email][ym] = []
+                    self.standbymonthly[email][ym] = 0
+                self.daysbymonth[email][ym].append(date)
+            self.sumbyuser[email][date][t] = self.sumbyuser[email][date].get(t, 0) + hours
+            if t is HourType.STANDBY:
+                self.standbymonthly[email][ym] += hours
+
+        # sumprojectactivity update
+        if self.doProjectActivity:
+            if (email, project, activity) not in self.sumprojectactivity.keys():
+                self.sumprojectactivity[email, project, activity] = {}
+            if date not in self.sumprojectactivity[email, project, activity].keys():
+                self.sumprojectactivity[email, project, activity][date] = {}
+            self.sumprojectactivity[email, project, activity][date][t] = (
+                self.sumprojectactivity[email, project, activity][date].get(t, 0) + hours
+            )
+
+        # sumprojectmonthly update
+        if self.doProjectMonthly:
+            if (email, project, activity) not in self.sumprojectmonthly.keys():
+                self.sumprojectmonthly[email, project, activity] = {}
+            if ym not in self.sumprojectmonthly[email, project, activity].keys():
+                self.sumprojectmonthly[email, project, activity][ym] = {}
+            self.sumprojectmonthly[email, project, activity][ym][t] = (
+                self.sumprojectmonthly[email, project, activity][ym].get(t, 0) + hours
+            )
+
+        # sumstandby and sumhotline update
+        if t is HourType.STANDBY:
+            hotline = self.config.Hotlines.get(email, "?")
+            if self.doStandby:
+                if (hotline, email, project) not in self.sumstandby.keys():
+                    self.sumstandby[hotline, email, project] = {}
+                self.sumstandby[hotline, email, project][date] = (
+                    self.sumstandby[hotline, email, project].get(date, 0) + hours
+                )
+
+            if self.doHotline:
+                if hotline not in self.sumhotline.keys():
+                    self.sumhotline[hotline] = {}
+                self.sumhotline[hotline][date] = self.sumhotline[hotline].get(date, 0) + hours
+
+        # sumworkmonthly update
+        if t == HourType.WORK and self.doWorkMonthly:
+            if email not in self.sumworkmonthly:
+                self.sumworkmonthly[email] = {}
+            if ym not in self.sumworkmonthly[email]:
+                self.sumworkmonthly[email][ym] = {"projects": set(), "activities": set(), "work_hours": 0}
+
+            self.sumworkmonthly[email][ym]["projects"].add(project)
+            self.sumworkmonthly[email][ym]["activities"].add(activity)
+            self.sumworkmonthly[email][ym]["work_hours"] += hours
+
+    def merge(self, other):
+        """Adds the views of other, an in-memory Aggregator of the rows that follow the rows of self, e.g. of the
+        next chunk of an export. Merging the Aggregators of consecutive chunks in file order gives the same views,
+        including the order keys, dates and users were first seen in, as loading all rows into one Aggregator.
+
+        The dicts of other are taken over where self has no entry yet, so other must not be used afterwards."""
+        for email, user in other.users.items():
+            self.users.setdefault(email, user)
+        for email, approver in other.approvers.items():
+            self.approvers.setdefault(email, approver)
+        self.min_date = min(self.min_date, other.min_date)
+        self.max_date = max(self.max_date, other.max_date)
+
+        for email, days in other.sumbyuser.items():
+            if email not in self.sumbyuser:
+                self.sumbyuser[email] = days
+                self.standbymonthly[email] = other.standbymonthly[email]
+                self.daysbymonth[email] = other.daysbymonth[email]
+                continue
+            mydays = self.sumbyuser[email]
+            for ym, dates in other.daysbymonth[email].items():
+                if ym not in self.daysbymonth[email]:
+                    self.daysbymonth[email][ym] = []
+                    self.standbymonthly[email][ym] = 0
+                self.daysbymonth[email][ym] += [date for date in dates if date not in mydays]
+                self.standbymonthly[email][ym] += other.standbymonthly[email][ym]
+            add_nested(mydays, days)
+
+        add_nested(self.sumprojectactivity, other.sumprojectactivity)
+        add_nested(self.sumprojectmonthly, other.sumprojectmonthly)
+        add_nested(self.sumstandby, other.sumstandby)
+        add_nested(self.sumhotline, other.sumhotline)
+
+        for email, months in other.sumworkmonthly.items():
+            mymonths = self.sumworkmonthly.setdefault(email, {})
+            for ym, month in months.items():
+                if ym not in mymonths:
+                    mymonths[ym] = month
+                    continue
+                mymonths[ym]["projects"] |= month["projects"]
+                mymonths[ym]["activities"] |= month["activities"]
+                mymonths[ym]["work_hours"] += month["work_hours"]
+
+    def flush(self):
+        # called once all rows are loaded or changed, a backend buffering them adds them to its views
+        pass
+
+    def storeUserDay(self, email, date, hours):
+        # writes back the HourType -> hours of a sumbyuser day changed by the standby limiter
+        self.sumbyuser[email][date] = hours
+
+    def close(self):
+        pass
+
+
+def add_nested(target, source):
+    # adds the hours of source to target, nested dicts of the same shape with hours as leaves, taking over the dicts
+    # of source for keys target does not have
+    for key, value in source.items():
+        if key not in target:
+            target[key] = value
+        elif isinstance(value, dict):
+            add_nested(target[key], value)
+        else:
+            target[key] += value
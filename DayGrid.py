@@ -0,0 +1,126 @@
+import importlib.util
+from datetime import timedelta as td
+from common import HourType, HourFormat, HOUR, hours_to_number
+from config import Config
+
+# numpy is only imported when a DayGrid is created, as importing it takes longer than short runs
+np = None
+
+
+# index of each HourType along the last axis of the cube
+HT = {ht: i for i, ht in enumerate(HourType)}
+
+# cube value of a booking of 0 hours, which unlike no booking at all counts as booked while the days are classified
+BOOKED_ZERO = -(2**31)
+
+# day cell codes, None text means the cell shows the work hours
+CELLS = [
+    (None, HourFormat.WORK),
+    (None, HourFormat.UNDER),
+    (None, HourFormat.OVER),
+    ("V", HourFormat.VACATION),
+    ("S", HourFormat.SICK),
+    ("-", HourFormat.MISS),
+    ("?", HourFormat.QUESTION),
+    ("", HourFormat.EMPTY),
+]
+
+
+def available():
+    return importlib.util.find_spec("numpy") is not None
+
+
+def load_numpy():
+    global np
+    if np is None:
+        import numpy
+
+        np = numpy
+
+
+class DayGrid:
+    """Dense entity x day x HourType cube of hours for the day-grid sheets, backed by NumPy.
+
+    Hours are integer hundredths, like in the Aggregator views, in int32 with 0 for days without a booking. Totals,
+    overtime and the day cell classification of SheetGenerator.get_day_cell are computed for the whole grid at once.
+    """
+
+    def __init__(self, config: Config, view, keys, emails, min_date, max_date):
+        load_numpy()
+        n = len(keys)
+        days = max(0, (max_date - min_date).days + 1)
+        first = min_date.toordinal()
+
+        idx_entity, idx_day, idx_type, values = [], [], [], []
+        for i, key in enumerate(keys):
+            for date, hours in view[key].items():
+                d = date.toordinal() - first
+                for ht, h in hours.items():
+                    idx_entity.append(i)
+                    idx_day.append(d)
+                    idx_type.append(HT[ht])
+                    values.append(h if h != 0 else BOOKED_ZERO)
+
+        self.hours = np.zeros((n, days, len(HT)), dtype=np.int32)
+        self.hours[idx_entity, idx_day, idx_type] = values
+
+        # one working day row per calendar, shared by all users of that calendar
+        calendars = {}
+        self.working = np.zeros((n, days), dtype=bool)
+        for i, email in enumerate(emails):
+            c = config.get_calendar(email)
+            if c.name not in calendars:
+                calendars[c.name] = np.array([c.is_working_day(min_date + td(days=d)) for d in range(days)], dtype=bool)
+            self.working[i] = calendars[c.name]
+
+        self._classify()
+
+    def _classify(self):
+        full = 8 * HOUR
+        h = self.hours
+        # booked days of each HourType, after which the bookings of 0 hours are plain 0 hours
+        booked = {}
+        for ht in HourType:
+            hours = h[:, :, HT[ht]]
+            zero = hours == BOOKED_ZERO
+            booked[ht] = (hours != 0) | zero
+            hours[zero] = 0
+
+        active = h.sum(axis=2) - h[:, :, HT[HourType.STANDBY]]
+        w = h[:, :, HT[HourType.WORK]]
+
+        def only(ht):
+            # mask of days where ht is booked and nothing else apart from standby
+            return booked[ht] & (active - h[:, :, HT[ht]] <= 0)
+
+        only_w = only(HourType.WORK)
+        only_v = only(HourType.VACATION) & (h[:, :, HT[HourType.VACATION]] == full)
+        only_s = only(HourType.SICK) & (h[:, :, HT[HourType.SICK]] == full)
+        only_h = only(HourType.HOLIDAY) & (h[:, :, HT[HourType.HOLIDAY]] == full)
+
+        workday = np.select(
+            [only_w & (w == full), only_w & (w < full), only_w, only_v, only_s, active == 0],
+            [0, 1, 2, 3, 4, 5],
+            6,
+        )
+        nonworkday = np.select([only_w & (w > 0), only_h, active == 0], [2, 7, 7], 6)
+        self.codes = np.where(self.working, workday, nonworkday)
+
+    def total_hours(self, i):
+        totals = self.hours[i].sum(axis=0).tolist()
+        return {ht: totals[HT[ht]] for ht in HourType}
+
+    def overtime_hours(self, i):
+        full = 8 * HOUR
+        w = self.hours[i, :, HT[HourType.WORK]]
+        working = self.working[i]
+        weekday = (w - full)[working & (w > full)].sum()
+        weekend = w[~working].sum()
+        return int(weekday + weekend)
+
+    def day_cells(self, i):
+        cells = []
+        for code, w in zip(self.codes[i].tolist(), self.hours[i, :, HT[HourType.WORK]].tolist()):
+            text, format = CELLS[code]
+            cells.append((hours_to_number(w) if text is None else text, format))
+        return cells
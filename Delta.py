@@ -0,0 +1,59 @@
+import hashlib
+import json
+from common import HourType
+
+
+class Delta:
+    """Rows whose aggregated values changed between two runs, e.g. after late timesheet corrections.
+
+    Each run is reduced to a fingerprint of the hours of every (email, project, activity, date) of sumprojectactivity,
+    so comparing two runs is a single pass over their keys. A run's fingerprints can be saved as a snapshot and
+    compared with a later export instead of parsing the earlier export again.
+
+    - rows: (email, project, activity) of the Project daily rows with a changed, added or removed day
+    - emails: emails of the Payroll (summary) rows with any such day
+
+    Rows and emails without any day left in the later run were removed, the sheets write them with zero totals.
+    """
+
+    VERSION = 1
+
+    def __init__(self, changed):
+        self.changed = changed
+        self.rows = {key[:3] for key in changed}
+        self.emails = {key[0] for key in changed}
+
+    @staticmethod
+    def fingerprints(data):
+        # (email, project, activity, date ordinal) -> hash of the hours of that day, which is stable across runs
+        fingerprints = {}
+        for (email, project, activity), days in data.sumprojectactivity.items():
+            for date, hours in days.items():
+                values = tuple(hours.get(ht, 0) for ht in HourType)
+                digest = hashlib.blake2b(repr(values).encode(), digest_size=8).digest()
+                fingerprints[email, project, activity, date.toordinal()] = int.from_bytes(digest, "little")
+        return fingerprints
+
+    @classmethod
+    def compare(cls, before, after):
+        changed = {key for key, value in after.items() if before.get(key) != value}
+        changed.update(key for key in before if key not in after)
+        return cls(changed)
+
+    @classmethod
+    def is_snapshot(cls, fn):
+        with open(fn, "rb") as f:
+            return f.read(12) == b'{"psgdelta":'
+
+    @classmethod
+    def save(cls, fn, fingerprints):
+        with open(fn, "w", encoding="utf-8") as f:
+            json.dump({"psgdelta": cls.VERSION, "fingerprints": [[*k, v] for k, v in fingerprints.items()]}, f)
+
+    @classmethod
+    def load(cls, fn):
+        with open(fn, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("psgdelta") != cls.VERSION:
+            raise ValueError(f"Unsupported snapshot version: {snapshot.get('psgdelta')}")
+        return {tuple(k[:4]): k[4] for k in snapshot["fingerprints"]}
@@ -0,0 +1,161 @@
+import html
+from PlainOutput import PlainWorksheet
+
+# xlsx format properties translated into CSS declarations, align, bold, indent and num_format are handled separately
+CSS_PROPERTIES = {"font_color": "color", "bg_color": "background-color"}
+# Python formats of the xlsx number formats used by the generators
+NUMBER_FORMATS = {"#,##0.00": "{:,.2f}"}
+# width in pixels of a column of the default xlsx width, and of each character of a set_column width
+DEFAULT_WIDTH = 64
+CHAR_WIDTH = 7
+
+STYLE = """
+body { font-family: arial, sans-serif; }
+h2 { margin-top: 48px; }
+div.chunk { content-visibility: auto; }
+table { table-layout: fixed; border-collapse: collapse; }
+td {
+  font-size: 11px;
+  padding: 2px;
+  border: solid 1px lightgray;
+  white-space: nowrap;
+  overflow: hidden;
+  text-overflow: ellipsis;
+}
+tr:empty { height: 17px; }
+"""
+
+
+def css_class(path):
+    # CSS class name of the format at path in cellFormats, its last key as the class is repeated in every cell, e.g.
+    # "work" for ("hourFormats", HourFormat.WORK)
+    return str(getattr(path[-1], "name", path[-1])).lower()
+
+
+def css_rule(name, properties):
+    declarations = [f"{CSS_PROPERTIES[key]}: {value}" for key, value in properties.items() if key in CSS_PROPERTIES]
+    align = properties.get("align")
+    if align is not None:
+        declarations.append(f"text-align: {align}")
+    if properties.get("bold"):
+        declarations.append("font-weight: bold")
+    if properties.get("indent"):
+        declarations.append(f"padding-{'right' if align == 'right' else 'left'}: {properties['indent']}em")
+    return f"td.{name} {{ {'; '.join(declarations)} }}\n"
+
+
+class HtmlWorksheet(PlainWorksheet):
+    """Streams the cells of a sheet into the file of its HtmlWorkbook, as a series of tables of CHUNK_ROWS rows each.
+
+    Formats are written as CSS classes. Browsers lay out and paint each chunk as soon as it arrives, and skip the
+    chunks out of view, so even a sheet of thousands of rows opens quickly. All chunks of a sheet have the same fixed
+    column widths, so their columns line up. The first chunk is written only when it is full or the sheet is done,
+    by which time the generators have set the column widths along with the header rows.
+    """
+
+    CHUNK_ROWS = 500
+    ROW_HEIGHT = 19
+
+    def __init__(self, f, classes):
+        super().__init__(f)
+        self.classes = classes
+        self.widths = {}
+        self.chunk = []
+        self.columns = 0
+
+    def cell(self, value, format):
+        return value, format
+
+    def set_column(self, first_col, last_col, width=None, *args, **kwargs):
+        if width is not None:
+            for col in range(first_col, last_col + 1):
+                self.widths[col] = round(width * CHAR_WIDTH) + 5
+
+    def td(self, cell):
+        if cell is None:
+            return "<td></td>"
+        value, format = cell
+        name, numberFormat = self.classes.get(id(format), (None, None))
+        if value is None:
+            text = ""
+        elif isinstance(value, str):
+            text = html.escape(value)
+        elif numberFormat is not None:
+            text = numberFormat.format(value)
+        else:
+            text = str(value)
+        return f"<td>{text}</td>" if name is None else f'<td class="{name}">{text}</td>'
+
+    def write_record(self, values):
+        self.chunk.append(f"<tr>{''.join(self.td(cell) for cell in values)}</tr>\n")
+        self.columns = max(self.columns, len(values))
+        if len(self.chunk) >= self.CHUNK_ROWS:
+            self.write_chunk()
+
+    def write_chunk(self):
+        columns = max([self.columns] + [col + 1 for col in self.widths])
+        widths = [self.widths.get(col, DEFAULT_WIDTH) for col in range(columns)]
+        width = sum(widths)
+        height = len(self.chunk) * self.ROW_HEIGHT
+        self.f.write(
+            f'<div class="chunk" style="contain-intrinsic-size: auto {width}px auto {height}px">'
+            f'<table style="width: {width}px"><colgroup>'
+        )
+        self.f.write("".join(f'<col style="width: {w}px">' for w in widths))
+        self.f.write("</colgroup>\n")
+        self.f.writelines(self.chunk)
+        self.f.write("</table></div>\n")
+        self.chunk = []
+
+    def close(self):
+        # the file is the workbook's, only the rows of this sheet are finished here
+        if self.cells:
+            self.flush()
+        if self.chunk:
+            self.write_chunk()
+
+
+class HtmlWorkbook:
+    """Streams all sheets into a single self-contained '<basename>.html' file, which opens in any browser.
+
+    cellFormats are the format objects the generators write with, and formats the properties they were made from
+    (the same structure, e.g. CELL_FORMATS). Each format becomes a CSS class, so the cells only name their class.
+    """
+
+    format = "html"
+
+    def __init__(self, basename, formats, cellFormats):
+        self.filename = f"{basename}.html"
+        self.classes = {}
+        rules = []
+
+        def addClasses(formats, cellFormats, path):
+            if not any(isinstance(value, dict) for value in formats.values()):
+                name = css_class(path)
+                self.classes[id(cellFormats)] = (name, NUMBER_FORMATS.get(formats.get("num_format")))
+                rules.append(css_rule(name, formats))
+                return
+            for key, value in formats.items():
+                addClasses(value, cellFormats[key], path + (key,))
+
+        addClasses(formats, cellFormats, ())
+        self.f = open(self.filename, "w", encoding="utf-8")
+        self.f.write(
+            f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{html.escape(basename)}</title>\n'
+        )
+        self.f.write(f"<style>{STYLE}{''.join(rules)}</style>\n</head>\n<body>\n")
+        self.worksheet = None
+
+    def add_worksheet(self, name):
+        if self.worksheet is not None:
+            self.worksheet.close()
+        self.f.write(f"<h2>{html.escape(name)}</h2>\n")
+        self.worksheet = HtmlWorksheet(self.f, self.classes)
+        return self.worksheet
+
+    def close(self):
+        if self.worksheet is not None:
+            self.worksheet.close()
+            self.worksheet = None
+        self.f.write("</body>\n</html>\n")
+        self.f.close()
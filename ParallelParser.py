@@ -0,0 +1,57 @@
+import gc
+from concurrent.futures import ProcessPoolExecutor
+from Aggregator import Aggregator
+from timesheet import RowClassifier, RowNormalizer, TimesheetReader
+
+_config = None
+_views = None
+_reader = None
+_classifier = None
+
+
+def _init_worker(config, views):
+    global _config, _views, _reader, _classifier
+    _config = config
+    _views = views
+    _classifier = RowClassifier(config)
+    _reader = TimesheetReader(RowNormalizer(config, _classifier))
+
+
+def _parse(inputfilename, start, end):
+    # returns (rows read, Aggregator of the included rows) of a byte range of the export
+    partial = Aggregator(_config, _views)
+    nrows = 0
+    for record in _reader.read_range(inputfilename, start, end):
+        nrows += 1
+        if _classifier.include(record):
+            partial.loadRow(record)
+    # the config is not sent back with the views
+    partial.config = None
+    return nrows, partial
+
+
+def parseParallel(data, inputfilename, jobs):
+    """Parses the export inputfilename in worker processes and merges the rows into data. Returns the number of rows
+    read.
+
+    The export is split at line boundaries into byte ranges, a few per worker so they stay busy. Each range is parsed
+    and aggregated on its own, and the partial Aggregators are merged in file order, which gives the same views as
+    loading the rows one by one.
+    """
+    ranges = TimesheetReader.split_lines(inputfilename, jobs * 4)
+    nrows = 0
+    # the partial views are a lot of small dicts, which the garbage collector would scan again and again while they
+    # are unpickled and merged, without finding anything to free
+    gc.disable()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(ranges)), initializer=_init_worker, initargs=(data.config, data.views)
+        ) as executor:
+            for n, partial in executor.map(
+                _parse, [inputfilename] * len(ranges), [r[0] for r in ranges], [r[1] for r in ranges]
+            ):
+                nrows += n
+                data.merge(partial)
+    finally:
+        gc.enable()
+    return nrows
@@ -0,0 +1,125 @@
+import csv
+import json
+import re
+from decimal import Decimal as dec
+from common import dec_to_number
+
+
+class PlainWorksheet:
+    """Worksheet stand-in that streams the cell values of a sheet into a plain text file, one record per sheet row,
+    in the layout of the xlsx sheet (title and header rows included). Formats, column widths and filters are ignored.
+
+    Generators write rows strictly top to bottom, so a row is complete and written out as soon as a later row is
+    started. Rows that are skipped in the sheet are written as empty records.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.row = 0
+        self.cells = {}
+
+    def write(self, row, col, value, format=None):
+        if row < self.row:
+            raise ValueError(f"Row {row} written after row {self.row}")
+        while self.row < row:
+            self.flush()
+        if isinstance(value, dec):
+            value = dec_to_number(value)
+        self.cells[col] = self.cell(value, format)
+
+    def cell(self, value, format):
+        # what is kept of a written cell until its row is written out
+        return value
+
+    def write_row(self, row, col, values, format=None):
+        for value in values:
+            self.write(row, col, value, format)
+            col += 1
+
+    def write_number(self, row, col, value, format=None):
+        self.write(row, col, value, format)
+
+    def write_string(self, row, col, value, format=None):
+        self.write(row, col, value, format)
+
+    def write_blank(self, row, col, value=None, format=None):
+        self.write(row, col, None, format)
+
+    def set_column(self, *args, **kwargs):
+        pass
+
+    def autofilter(self, *args, **kwargs):
+        pass
+
+    def flush(self):
+        values = [self.cells.get(col) for col in range(max(self.cells) + 1)] if self.cells else []
+        self.write_record(values)
+        self.cells = {}
+        self.row += 1
+
+    def close(self):
+        if self.cells:
+            self.flush()
+        self.f.close()
+
+
+class CsvWorksheet(PlainWorksheet):
+    def __init__(self, f):
+        super().__init__(f)
+        self.writer = csv.writer(f)
+
+    def write_record(self, values):
+        self.writer.writerow(["" if v is None else v for v in values])
+
+
+class JsonlWorksheet(PlainWorksheet):
+    def write_record(self, values):
+        self.f.write(json.dumps(values, ensure_ascii=False))
+        self.f.write("\n")
+
+
+class PlainWorkbook:
+    """Writes each sheet into its own '<basename>_<sheet name>.<format>' file."""
+
+    WORKSHEETS = {"csv": CsvWorksheet, "jsonl": JsonlWorksheet}
+
+    def __init__(self, basename, format):
+        self.basename = basename
+        self.format = format
+        self.filenames = []
+        self.worksheet = None
+
+    def add_worksheet(self, name):
+        if self.worksheet is not None:
+            self.worksheet.close()
+        filename = f"{self.basename}_{re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')}.{self.format}"
+        self.filenames.append(filename)
+        self.worksheet = self.WORKSHEETS[self.format](open(filename, "w", newline="", encoding="utf-8"))
+        return self.worksheet
+
+    def close(self):
+        if self.worksheet is not None:
+            self.worksheet.close()
+            self.worksheet = None
+
+
+class TeeWorksheet:
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            for worksheet in self.worksheets:
+                getattr(worksheet, method)(*args, **kwargs)
+
+        return call
+
+
+class TeeWorkbook:
+    """Passes the sheets of the generators to several workbooks at once, so each sheet is generated only once."""
+
+    def __init__(self, workbooks):
+        self.workbooks = workbooks
+
+    def add_worksheet(self, name):
+        return TeeWorksheet([workbook.add_worksheet(name) for workbook in self.workbooks])
@@ -0,0 +1,99 @@
+import json
+import time
+from contextlib import contextmanager
+
+# tracemalloc is only imported when a Profiler is started, as importing it slows down every start-up
+tracemalloc = None
+
+
+class Profiler:
+    """Records wall time, CPU time, rows processed and peak traced allocation of the phases of a run.
+
+    A disabled Profiler records nothing, so phases can be wrapped unconditionally. Peak allocation is measured with
+    tracemalloc, which slows the profiled run down noticeably.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        if enabled:
+            self.start()
+
+    def start(self):
+        global tracemalloc
+        if tracemalloc is None:
+            import tracemalloc
+        tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name, rows=None):
+        # yields the record of the phase, e.g. to set its rows; it is listed once the phase is finished, before the
+        # phases timed within it
+        if not self.enabled:
+            yield {}
+            return
+        p = {"phase": name, "wall": 0.0, "cpu": 0.0, "rows": rows, "peak": None}
+        i = len(self.phases)
+        tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield p
+        finally:
+            p["wall"] = time.perf_counter() - wall
+            p["cpu"] = time.process_time() - cpu
+            p["peak"] = tracemalloc.get_traced_memory()[1]
+            self.phases.insert(i, p)
+
+    def add(self, name, wall, cpu, rows=None, peak=None):
+        self.phases.append({"phase": name, "wall": wall, "cpu": cpu, "rows": rows, "peak": peak})
+        return self.phases[-1]
+
+    def timed(self, name, function):
+        # returns function wrapped to add up the time spent in its calls, e.g. per row, in one phase counting the calls,
+        # and the record of that phase
+        p = self.add(name, 0.0, 0.0, 0)
+
+        def call(*args, **kwargs):
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                p["wall"] += time.perf_counter() - wall
+                p["cpu"] += time.process_time() - cpu
+                p["rows"] += 1
+
+        return call, p
+
+    @staticmethod
+    def exclude(p, inner):
+        # removes the time of a phase timed within p from p
+        p["wall"] -= inner["wall"]
+        p["cpu"] -= inner["cpu"]
+
+    @staticmethod
+    def format_phase(p):
+        text = f"{p['phase']}: {p['wall']:.3f} s wall, {p['cpu']:.3f} s CPU"
+        if p["rows"] is not None:
+            text += f", {p['rows']} rows"
+            if p["wall"] > 0:
+                text += f" ({p['rows'] / p['wall']:,.0f}/s)"
+        if p["peak"] is not None:
+            text += f", {p['peak'] / 2**20:.1f} MB peak"
+        return text
+
+    def print_summary(self):
+        print(f"{'phase':<40} {'wall s':>9} {'cpu s':>9} {'rows':>10} {'rows/s':>12} {'peak MB':>9}")
+        for p in self.phases:
+            rows = f"{p['rows']:10}" if p["rows"] is not None else f"{'':10}"
+            throughput = f"{p['rows'] / p['wall']:12,.0f}" if p["rows"] and p["wall"] > 0 else f"{'':12}"
+            peak = f"{p['peak'] / 2**20:9.1f}" if p["peak"] is not None else f"{'':9}"
+            print(f"{p['phase']:<40} {p['wall']:9.3f} {p['cpu']:9.3f} {rows} {throughput} {peak}")
+        print(f"{'total':<40} {sum(p['wall'] for p in self.phases):9.3f} {sum(p['cpu'] for p in self.phases):9.3f}")
+
+    def dump_json(self, fn, **info):
+        # serialized before the file is opened, so a value that cannot be serialized leaves no truncated file
+        s = json.dumps({**info, "phases": self.phases}, indent=2)
+        with open(fn, "w", encoding="utf-8") as f:
+            f.write(s)
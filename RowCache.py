@@ -0,0 +1,118 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from datetime import datetime as dt
+from timesheet import TimesheetReader, TimesheetRow
+
+
+class RowCache:
+    """Binary cache of the parsed rows of a timesheet export, stored next to it as '<export>.psgcache'.
+
+    The cache is keyed by a hash of the export's bytes and VERSION, and holds every data row of the export, so
+    user/project filters are applied to the cached rows, not baked into them. The file consists of a header, a table
+    of the distinct strings and 8 int32 per row (date ordinal, string indices of email, user, approver, project,
+    description and activity, hours in hundredths). It is memory-mapped when read.
+    """
+
+    VERSION = 1
+    MAGIC = b"PSGC"
+    HEADER = struct.Struct("=4sI32sII")
+    FIELDS = 8
+
+    def __init__(self, reader: TimesheetReader):
+        self.reader = reader
+
+    @staticmethod
+    def cache_path(inputfilename):
+        return f"{inputfilename}.psgcache"
+
+    def digest(self, inputfilename):
+        h = hashlib.sha256(f"psg-{self.VERSION}".encode())
+        with open(inputfilename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.digest()
+
+    def read(self, inputfilename):
+        """Yields the TimesheetRows of inputfilename, from the cache if it is valid, otherwise by parsing the export
+        and storing the cache for the next run."""
+        digest = self.digest(inputfilename)
+        path = self.cache_path(inputfilename)
+        if os.path.exists(path) and self._valid(path, digest):
+            yield from self._load(path)
+        else:
+            yield from self._parse_and_store(inputfilename, path, digest)
+
+    def _valid(self, path, digest):
+        try:
+            with open(path, "rb") as f:
+                magic, version, d, _, _ = self.HEADER.unpack(f.read(self.HEADER.size))
+            return magic == self.MAGIC and version == self.VERSION and d == digest
+        except (OSError, struct.error):
+            return False
+
+    def _load(self, path):
+        normalizer = self.reader.normalizer
+        dates = {}
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            _, _, _, stringsize, nrows = self.HEADER.unpack_from(mm, 0)
+            offset = self.HEADER.size
+            strings = mm[offset : offset + stringsize].decode("utf-8").split("\0")
+            offset += stringsize
+            rows = memoryview(mm)[offset : offset + nrows * self.FIELDS * 4].cast("i")
+            try:
+                for i in range(0, len(rows), self.FIELDS):
+                    o, email, user, approver, proj, desc, activity, hours = rows[i : i + self.FIELDS]
+                    if o not in dates:
+                        dates[o] = dt.fromordinal(o)
+                    yield normalizer.record(
+                        dates[o],
+                        strings[email],
+                        strings[user],
+                        strings[approver],
+                        strings[proj],
+                        strings[desc],
+                        strings[activity],
+                        hours,
+                    )
+            finally:
+                rows.release()
+
+    def _parse_and_store(self, inputfilename, path, digest):
+        strings = {}
+        rows = array("i")
+
+        def index(s):
+            if s not in strings:
+                strings[s] = len(strings)
+            return strings[s]
+
+        for record in self.reader.read_file(inputfilename):
+            rows.extend(self._fields(record, index))
+            yield record
+
+        stringtable = "\0".join(strings.keys()).encode("utf-8")
+        try:
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, digest, len(stringtable), len(rows) // self.FIELDS))
+                f.write(stringtable)
+                rows.tofile(f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as exc:
+            print(f"Could not write cache '{path}'")
+            print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+
+    @staticmethod
+    def _fields(record: TimesheetRow, index):
+        return (
+            record.date.toordinal(),
+            index(record.email),
+            index(record.user),
+            index(record.approver),
+            index(record.project),
+            index(record.description),
+            index(record.activity),
+            record.hours,
+        )
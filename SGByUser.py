@@ -1,66 +1,90 @@
 from datetime import timedelta as td
-from decimal import Decimal as dec
 from SGStandbyLimiter import SGStandbyLimiter
-from common import HourType, HourFormat, dec_to_number
+from common import HourType, HourFormat, HOUR, trunc_div
 from config import Config
+from Aggregator import Aggregator
+from DayGrid import DayGrid
 
 
 class SGByUser(SGStandbyLimiter):
-    def __init__(self, config: Config, cellFormats, standbylimit, managerFromConfig) -> None:
-        super().__init__(config, cellFormats, standbylimit)
+    SHEET_NAME = "Payroll (summary)"
+    VIEWS = {"sumbyuser"}
+
+    def __init__(
+        self,
+        config: Config,
+        cellFormats,
+        data: Aggregator,
+        standbylimit,
+        managerFromConfig,
+        useNumpy=False,
+        emails=None,
+    ) -> None:
+        super().__init__(config, cellFormats, data, standbylimit)
         self.managerFromConfig = managerFromConfig
+        self.useNumpy = useNumpy
+        # only the rows of these emails are written (e.g. the changed ones of a delta), all of them if None. Those
+        # without any hours (removed since the previous run of a delta) get a row of zeros and empty days
+        self.emails = emails
 
     def generateHeader(self, worksheet):
-        self.generateCommonColumnHeaders(worksheet, 1, 0)
-        for i, headerText in enumerate(["WorkH", "WorkD", "VacaD", "SickD", "OverH", "StbyH"]):
-            self.generateColumnHeader(worksheet, 1, 3 + i, headerText, self.cellFormats["headernum"], 8)
         self.generateHeaderDays(worksheet, 1, 9)
+        self.generateCommonColumnHeaders(worksheet, 1, 0)
+        headerTexts = ["WorkH", "WorkD", "VacaD", "SickD", "OverH", "StbyH"]
+        self.generateColumnHeaders(worksheet, 1, 3, headerTexts, self.cellFormats["headernum"], 8)
 
     def generateData(self, worksheet):
         row = 2
         col = 9
-        for email in sorted(self.sumbyuser.keys()):
-            total_hours = {}
-            for ht in HourType:
-                total_hours[ht] = sum([self.sumbyuser[email][date].get(ht, 0) for date in self.sumbyuser[email]])
+        emails = sorted(self.sumbyuser.keys() if self.emails is None else self.emails & self.sumbyuser.keys())
+        removed = set() if self.emails is None else self.emails - self.sumbyuser.keys()
+        grid = None
+        if self.useNumpy:
+            grid = DayGrid(self.config, self.sumbyuser, emails, emails, self.min_date, self.max_date)
+
+        index = {email: i for i, email in enumerate(emails)}
+        for email in sorted(index.keys() | removed):
+            if email in removed:
+                col = self.generateRemovedRow(worksheet, row, email)
+                row += 1
+                continue
+
+            i = index[email]
+            if grid is not None:
+                total_hours = grid.total_hours(i)
+            else:
+                total_hours = {}
+                for ht in HourType:
+                    total_hours[ht] = sum([self.sumbyuser[email][date].get(ht, 0) for date in self.sumbyuser[email]])
 
             # if there are filter projects configured, then filter out people with 0 hours against projects
             if len(self.config.Projects) > 0 and total_hours[HourType.WORK] == 0:
                 continue
 
-            weekday_overtime_hours = sum(
-                [
-                    self.sumbyuser[email][date].get(HourType.WORK, 0) - 8
-                    for date in self.sumbyuser[email]
-                    if self.is_working_day(date) and self.sumbyuser[email][date].get(HourType.WORK, 0) > 8
-                ]
-            )
-            weekend_overtime_hours = sum(
-                [
-                    self.sumbyuser[email][date].get(HourType.WORK, 0)
-                    for date in self.sumbyuser[email]
-                    if not self.is_working_day(date)
-                ]
-            )
-            overtime_hours = weekday_overtime_hours + weekend_overtime_hours
-
-            date = self.min_date
-            col = 9
-            while date <= self.max_date:
-                hours = {}
-                if date in self.sumbyuser[email].keys():
-                    hours = self.sumbyuser[email][date]
-
-                value, format = self.get_day_cell(date, hours)
-                if isinstance(value, int) or isinstance(value, float):
-                    worksheet.write_number(row, col, value, self.cellFormats["hourFormats"][format])
-                elif isinstance(value, dec):
-                    worksheet.write_number(row, col, dec_to_number(value), self.cellFormats["hourFormats"][format])
-                else:
-                    worksheet.write(row, col, value, self.cellFormats["hourFormats"][format])
-
-                date = date + td(days=1)
-                col += 1
+            if grid is not None:
+                overtime_hours = grid.overtime_hours(i)
+                cells = grid.day_cells(i)
+            else:
+                weekday_overtime_hours = sum(
+                    [
+                        self.sumbyuser[email][date].get(HourType.WORK, 0) - 8 * HOUR
+                        for date in self.sumbyuser[email]
+                        if self.is_working_day(date, email)
+                        and self.sumbyuser[email][date].get(HourType.WORK, 0) > 8 * HOUR
+                    ]
+                )
+                weekend_overtime_hours = sum(
+                    [
+                        self.sumbyuser[email][date].get(HourType.WORK, 0)
+                        for date in self.sumbyuser[email]
+                        if not self.is_working_day(date, email)
+                    ]
+                )
+                overtime_hours = weekday_overtime_hours + weekend_overtime_hours
+                cells = self.get_day_cells(self.sumbyuser[email], email)
+
+            col = 9 + len(cells)
+            self.writeRow(worksheet, row, 9, cells, self.cellFormats["hourFormats"])
 
             manager = self.approvers[email]
             if self.managerFromConfig:
@@ -68,44 +92,63 @@ class SGByUser(SGStandbyLimiter):
                     manager = self.config.UserData[email]["Reporting to"]
 
             worksheet.write(row, 0, email, self.cellFormats["datatxt"])
-            worksheet.write(row, 1, self.users[email])
-            worksheet.write(row, 2, manager)
-            worksheet.write_number(row, 3, int(total_hours[HourType.WORK]), self.cellFormats["datanum"])
-            worksheet.write_number(
-                row, 4, int((total_hours[HourType.WORK] - overtime_hours) // dec(8)), self.cellFormats["datanum"]
+            worksheet.write_row(row, 1, [self.users[email], manager])
+            worksheet.write_row(
+                row,
+                3,
+                [
+                    trunc_div(total_hours[HourType.WORK], HOUR),
+                    trunc_div(total_hours[HourType.WORK] - overtime_hours, 8 * HOUR),
+                    trunc_div(total_hours[HourType.VACATION], 8 * HOUR),
+                    trunc_div(total_hours[HourType.SICK], 8 * HOUR),
+                    trunc_div(overtime_hours, HOUR),
+                    trunc_div(total_hours[HourType.STANDBY], HOUR),
+                ],
+                self.cellFormats["datanum"],
             )
-            worksheet.write_number(row, 5, int(total_hours[HourType.VACATION] // dec(8)), self.cellFormats["datanum"])
-            worksheet.write_number(row, 6, int(total_hours[HourType.SICK] // dec(8)), self.cellFormats["datanum"])
-            worksheet.write_number(row, 7, int(overtime_hours), self.cellFormats["datanum"])
-            worksheet.write_number(row, 8, int(total_hours[HourType.STANDBY]), self.cellFormats["datanum"])
 
             row += 1
 
-        for email in sorted(self.config.Users):
+        # users without any hours are not a change, so a delta does not list them
+        for email in sorted(self.config.Users) if self.emails is None else []:
             if email not in self.sumbyuser.keys() and f"{email}@capgemini.com" not in self.sumbyuser.keys():
                 worksheet.write(row, 0, email, self.cellFormats["datatxt"])
 
+                cells = []
                 date = self.min_date
-                col = 9
                 while date <= self.max_date:
-                    if self.is_working_day(date):
-                        worksheet.write(row, col, "-", self.cellFormats["hourFormats"][HourFormat.MISS])
+                    if self.is_working_day(date, email):
+                        cells.append(("-", HourFormat.MISS))
                     else:
-                        worksheet.write(row, col, "", self.cellFormats["hourFormats"][HourFormat.EMPTY])
-
+                        cells.append(("", HourFormat.EMPTY))
                     date = date + td(days=1)
-                    col += 1
+                col = 9 + len(cells)
+                self.writeRow(worksheet, row, 9, cells, self.cellFormats["hourFormats"])
 
-                for c in range(1, 7):
-                    worksheet.write(row, c, 0, self.cellFormats["datanum"])
+                worksheet.write_row(row, 1, [0] * 6, self.cellFormats["datanum"])
 
                 row += 1
 
         worksheet.autofilter(1, 0, row - 1, col - 1)
 
+    def generateRemovedRow(self, worksheet, row, email):
+        # row of a user without any hours left, returns the column after the days
+        cells = self.get_removed_day_cells()
+        self.writeRow(worksheet, row, 9, cells, self.cellFormats["hourFormats"])
+
+        manager = self.approvers.get(email, "")
+        if self.managerFromConfig:
+            if email in self.config.UserData.keys():
+                manager = self.config.UserData[email]["Reporting to"]
+
+        worksheet.write(row, 0, email, self.cellFormats["datatxt"])
+        worksheet.write_row(row, 1, [self.users.get(email, ""), manager])
+        worksheet.write_row(row, 3, [0] * 6, self.cellFormats["datanum"])
+        return 9 + len(cells)
+
     def generateSheet(self, workbook):
         if self.standbylimit:
             self.limitStandby()
-        worksheet = workbook.add_worksheet("Payroll (summary)")
+        worksheet = workbook.add_worksheet(self.SHEET_NAME)
         self.generateHeader(worksheet)
         self.generateData(worksheet)
@@ -1,9 +1,17 @@
 from datetime import datetime as dt
 from common import format_date, format_datetime
-from SGStandbyLimiter import SGStandbyLimiter
+from SheetGenerator import SheetGenerator
+from Profiler import Profiler
 
 
-class SGInfo(SGStandbyLimiter):
+class SGInfo(SheetGenerator):
+    SHEET_NAME = "Info"
+    VIEWS = set()
+
+    def __init__(self, config, cellFormats, data, profiler: Profiler = None):
+        super().__init__(config, cellFormats, data)
+        self.profiler = profiler
+
     def generateData(self, worksheet):
         duration = f"{format_date(self.min_date)} - {format_date(self.max_date)}"
         projects = "no filter" if len(self.config.Projects) == 0 else ", ".join(self.config.Projects)
@@ -14,6 +22,12 @@ class SGInfo(SGStandbyLimiter):
         worksheet.write(2, 0, f"Users: {users}")
         worksheet.write(3, 0, f"Generated: {generated}")
 
+        # phases finished before this sheet is generated, i.e. without the remaining sheets and closing the workbook
+        if self.profiler is not None and self.profiler.enabled:
+            worksheet.write(5, 0, "Timings:")
+            for i, p in enumerate(self.profiler.phases):
+                worksheet.write(6 + i, 0, Profiler.format_phase(p))
+
     def generateSheet(self, workbook):
-        worksheet = workbook.add_worksheet("Info")
+        worksheet = workbook.add_worksheet(self.SHEET_NAME)
         self.generateData(worksheet)
@@ -1,115 +1,142 @@
-from datetime import datetime as dt, timedelta as td
-from decimal import Decimal as dec
-from SGStandbyLimiter import SGStandbyLimiter
-from common import HourType, dec_to_number
+from SheetGenerator import SheetGenerator
+from common import HourType, HOUR, trunc_div
 from config import Config
+from Aggregator import Aggregator
+from DayGrid import DayGrid
 
 
-class SGProjectDaily(SGStandbyLimiter):
-    def __init__(self, config: Config, cellFormats, managerFromConfig) -> None:
-        super().__init__(config, cellFormats, False)
+class SGProjectDaily(SheetGenerator):
+    SHEET_NAME = "Project daily"
+    VIEWS = {"sumprojectactivity"}
+
+    def __init__(
+        self, config: Config, cellFormats, data: Aggregator, managerFromConfig, useNumpy=False, keys=None
+    ) -> None:
+        super().__init__(config, cellFormats, data)
         self.managerFromConfig = managerFromConfig
-        self.sumprojectdaily = {}
-
-    def loadRow(self, row):
-        super().loadRow(row)
-
-        # Assumption: if first field can be parsed as date, then it is a data row
-        date = None
-        try:
-            date = dt.strptime(row["Date"], "%Y%m%d")
-        except ValueError:
-            return
-
-        email = row["Email Address"].lower()
-
-        t = self.get_hour_type(row["Project"], row["Activity"])
-
-        proj = row["Project"]
-        desc = row["Project Description"]
-        project = f"{proj} {desc}" if proj != desc else proj
-        activity = row["Activity"]
-        if (email, project, activity) not in self.sumprojectdaily.keys():
-            self.sumprojectdaily[email, project, activity] = {}
-        if date not in self.sumprojectdaily[email, project, activity].keys():
-            self.sumprojectdaily[email, project, activity][date] = {}
-        self.sumprojectdaily[email, project, activity][date][t] = self.sumprojectdaily[email, project, activity][
-            date
-        ].get(t, 0) + dec(row["Hours"])
+        self.useNumpy = useNumpy
+        # only the rows of these (email, project, activity) are written (e.g. the changed ones of a delta), all of
+        # them if None. Those without any hours (removed since the previous run of a delta) get a row of zeros and
+        # empty days
+        self.keys = keys
 
     def generateHeader(self, worksheet):
+        self.generateHeaderDays(worksheet, 1, 11)
         self.generateCommonColumnHeaders(worksheet, 1, 0)
         self.generateColumnHeader(worksheet, 1, 3, "Status", self.cellFormats["headertxt"], 12)
         self.generateColumnHeader(worksheet, 1, 4, "Job Title", self.cellFormats["headertxt"], 40)
         self.generateColumnHeader(worksheet, 1, 5, "Grade", self.cellFormats["headertxt"], 12)
         self.generateColumnHeader(worksheet, 1, 6, "Project", self.cellFormats["headertxt"], 48)
         self.generateColumnHeader(worksheet, 1, 7, "Activity", self.cellFormats["headertxt"], 12)
-        for i, headerText in enumerate(["WorkH", "VacaD", "SickD"]):
-            self.generateColumnHeader(worksheet, 1, 8 + i, headerText, self.cellFormats["headernum"], 8)
-        self.generateHeaderDays(worksheet, 1, 11)
+        self.generateColumnHeaders(worksheet, 1, 8, ["WorkH", "VacaD", "SickD"], self.cellFormats["headernum"], 8)
 
     def generateData(self, worksheet):
         row = 2
         col = 11
-        for email, project, activity in sorted(self.sumprojectdaily.keys()):
-            if self.get_hour_type(project, activity) != HourType.STANDBY:
+        keys = [
+            (email, project, activity)
+            for email, project, activity in sorted(
+                self.data.sumprojectactivity.keys()
+                if self.keys is None
+                else self.keys & self.data.sumprojectactivity.keys()
+            )
+            if self.get_hour_type(project, activity) != HourType.STANDBY
+        ]
+        removed = set()
+        if self.keys is not None:
+            removed = {
+                (email, project, activity)
+                for email, project, activity in self.keys - self.data.sumprojectactivity.keys()
+                if self.get_hour_type(project, activity) != HourType.STANDBY
+            }
+        grid = None
+        if self.useNumpy:
+            emails = [key[0] for key in keys]
+            grid = DayGrid(self.config, self.data.sumprojectactivity, keys, emails, self.min_date, self.max_date)
+
+        index = {key: i for i, key in enumerate(keys)}
+        for email, project, activity in sorted(index.keys() | removed):
+            if (email, project, activity) in removed:
+                col = self.generateRemovedRow(worksheet, row, email, project, activity)
+                row += 1
+                continue
+
+            i = index[email, project, activity]
+            if grid is not None:
+                total_hours = grid.total_hours(i)
+            else:
                 total_hours = {}
                 for ht in HourType:
                     total_hours[ht] = sum(
                         [
-                            self.sumprojectdaily[email, project, activity][date].get(ht, 0)
-                            for date in self.sumprojectdaily[email, project, activity]
+                            self.data.sumprojectactivity[email, project, activity][date].get(ht, 0)
+                            for date in self.data.sumprojectactivity[email, project, activity]
                         ]
                     )
 
-                # if there are filter projects configured, then filter out people with 0 hours against projects
-                if len(self.config.Projects) > 0 and total_hours[HourType.WORK] == 0:
-                    continue
-
-                date = self.min_date
-                col = 11
-                while date <= self.max_date:
-                    hours = {}
-                    if date in self.sumprojectdaily[email, project, activity].keys():
-                        hours = self.sumprojectdaily[email, project, activity][date]
-
-                    value, format = self.get_day_cell(date, hours)
-
-                    if isinstance(value, int) or isinstance(value, float):
-                        worksheet.write_number(row, col, value, self.cellFormats["hourFormats"][format])
-                    elif isinstance(value, dec):
-                        worksheet.write_number(row, col, dec_to_number(value), self.cellFormats["hourFormats"][format])
-                    else:
-                        worksheet.write(row, col, value, self.cellFormats["hourFormats"][format])
-
-                    date = date + td(days=1)
-                    col += 1
-
-                manager = self.approvers[email]
-                if self.managerFromConfig:
-                    if email in self.config.UserData.keys():
-                        manager = self.config.UserData[email]["Reporting to"]
-
-                worksheet.write(row, 0, email, self.cellFormats["datatxt"])
-                worksheet.write(row, 1, self.users[email])
-                worksheet.write(row, 2, manager)
+            # if there are filter projects configured, then filter out people with 0 hours against projects
+            if len(self.config.Projects) > 0 and total_hours[HourType.WORK] == 0:
+                continue
+
+            if grid is not None:
+                cells = grid.day_cells(i)
+            else:
+                cells = self.get_day_cells(self.data.sumprojectactivity[email, project, activity], email)
+
+            col = 11 + len(cells)
+            self.writeRow(worksheet, row, 11, cells, self.cellFormats["hourFormats"])
+
+            manager = self.approvers[email]
+            if self.managerFromConfig:
                 if email in self.config.UserData.keys():
-                    worksheet.write(row, 3, self.config.UserData[email].get("Employment Status", ""))
-                    worksheet.write(row, 4, self.config.UserData[email].get("Job Title", ""))
-                    worksheet.write(row, 5, self.config.UserData[email].get("Global Grade", ""))
-                worksheet.write(row, 6, project)
-                worksheet.write(row, 7, activity)
-                worksheet.write_number(row, 8, int(total_hours[HourType.WORK]), self.cellFormats["datanum"])
-                worksheet.write_number(
-                    row, 9, int(total_hours[HourType.VACATION] // dec(8)), self.cellFormats["datanum"]
+                    manager = self.config.UserData[email]["Reporting to"]
+
+            worksheet.write(row, 0, email, self.cellFormats["datatxt"])
+            worksheet.write_row(row, 1, [self.users[email], manager])
+            if email in self.config.UserData.keys():
+                userData = self.config.UserData[email]
+                worksheet.write_row(
+                    row,
+                    3,
+                    [
+                        userData.get("Employment Status", ""),
+                        userData.get("Job Title", ""),
+                        userData.get("Global Grade", ""),
+                    ],
                 )
-                worksheet.write_number(row, 10, int(total_hours[HourType.SICK] // dec(8)), self.cellFormats["datanum"])
-
-                row += 1
+            worksheet.write_row(row, 6, [project, activity])
+            worksheet.write_row(
+                row,
+                8,
+                [
+                    trunc_div(total_hours[HourType.WORK], HOUR),
+                    trunc_div(total_hours[HourType.VACATION], 8 * HOUR),
+                    trunc_div(total_hours[HourType.SICK], 8 * HOUR),
+                ],
+                self.cellFormats["datanum"],
+            )
+
+            row += 1
 
         worksheet.autofilter(1, 0, row - 1, col - 1)
 
+    def generateRemovedRow(self, worksheet, row, email, project, activity):
+        # row of an (email, project, activity) without any hours left, returns the column after the days
+        cells = self.get_removed_day_cells()
+        self.writeRow(worksheet, row, 11, cells, self.cellFormats["hourFormats"])
+
+        manager = self.approvers.get(email, "")
+        if self.managerFromConfig:
+            if email in self.config.UserData.keys():
+                manager = self.config.UserData[email]["Reporting to"]
+
+        worksheet.write(row, 0, email, self.cellFormats["datatxt"])
+        worksheet.write_row(row, 1, [self.users.get(email, ""), manager])
+        worksheet.write_row(row, 6, [project, activity])
+        worksheet.write_row(row, 8, [0] * 3, self.cellFormats["datanum"])
+        return 11 + len(cells)
+
     def generateSheet(self, workbook):
-        worksheet = workbook.add_worksheet("Project daily")
+        worksheet = workbook.add_worksheet(self.SHEET_NAME)
         self.generateHeader(worksheet)
         self.generateData(worksheet)
@@ -1,72 +1,40 @@
-from datetime import datetime as dt, timedelta as td
-from decimal import Decimal as dec
-from SGStandbyLimiter import SGStandbyLimiter
-from common import HourFormat, HourType, dec_to_number
+from datetime import timedelta as td
+from SheetGenerator import SheetGenerator
+from common import HourFormat, HOUR, hours_to_number
 from config import Config
-import config
+from Aggregator import Aggregator
 
 
-class SGStandby(SGStandbyLimiter):
-    def __init__(self, config: Config, cellFormats, managerFromConfig) -> None:
-        super().__init__(config, cellFormats, False)
+class SGStandby(SheetGenerator):
+    SHEET_NAME = "Standby"
+    VIEWS = {"sumstandby", "sumhotline"}
+
+    def __init__(self, config: Config, cellFormats, data: Aggregator, managerFromConfig) -> None:
+        super().__init__(config, cellFormats, data)
         self.managerFromConfig = managerFromConfig
-        self.sumstandby = {}
-        self.sumhotline = {}
-
-    def loadRow(self, row):
-        super().loadRow(row)
-
-        # Assumption: if first field can be parsed as date, then it is a data row
-        date = None
-        try:
-            date = dt.strptime(row["Date"], "%Y%m%d")
-        except ValueError:
-            return
-
-        email = row["Email Address"].lower()
-
-        t = self.get_hour_type(row["Project"], row["Activity"])
-
-        if t is HourType.STANDBY:
-            proj = row["Project"]
-            desc = row["Project Description"]
-            project = f"{proj} {desc}" if proj != desc else proj
-            hotline = self.config.Hotlines.get(email, "?")
-            if (hotline, email, project) not in self.sumstandby.keys():
-                self.sumstandby[hotline, email, project] = {}
-            self.sumstandby[hotline, email, project][date] = self.sumstandby[hotline, email, project].get(
-                date, 0
-            ) + dec(row["Hours"])
-
-            if hotline not in self.sumhotline.keys():
-                self.sumhotline[hotline] = {}
-            self.sumhotline[hotline][date] = self.sumhotline[hotline].get(date, 0) + dec(row["Hours"])
 
     def generateHeader(self, worksheet):
+        self.generateHeaderDays(worksheet, 1, 6)
         self.generateColumnHeader(worksheet, 1, 0, "Hotline", self.cellFormats["headertxt"], 24)
         self.generateCommonColumnHeaders(worksheet, 1, 1)
         self.generateColumnHeader(worksheet, 1, 4, "Project", self.cellFormats["headertxt"], 48)
         self.generateColumnHeader(worksheet, 1, 5, "StbyH", self.cellFormats["headernum"], 8)
-        self.generateHeaderDays(worksheet, 1, 6)
 
     def generateData(self, worksheet):
         row = 2
         col = 5
-        for hotline, email, project in sorted(self.sumstandby.keys()):
+        for hotline, email, project in sorted(self.data.sumstandby.keys()):
+            cells = []
             date = self.min_date
-            col = 6
             while date <= self.max_date:
-                hours = dec(0)
-                if date in self.sumstandby[hotline, email, project].keys():
-                    hours = self.sumstandby[hotline, email, project][date]
-
-                if hours > 0:
-                    worksheet.write_number(
-                        row, col, dec_to_number(hours), self.cellFormats["hourFormats"][HourFormat.STANDBY]
-                    )
+                hours = 0
+                if date in self.data.sumstandby[hotline, email, project].keys():
+                    hours = self.data.sumstandby[hotline, email, project][date]
 
+                cells.append((hours_to_number(hours) if hours > 0 else None, HourFormat.STANDBY))
                 date = date + td(days=1)
-                col += 1
+            col = 6 + len(cells)
+            self.writeRow(worksheet, row, 6, cells, self.cellFormats["hourFormats"])
 
             manager = self.approvers[email]
             if self.managerFromConfig:
@@ -75,17 +43,17 @@ class SGStandby(SGStandbyLimiter):
 
             worksheet.write(row, 0, hotline)
             worksheet.write(row, 1, email, self.cellFormats["datatxt"])
-            worksheet.write(row, 2, self.users[email])
-            worksheet.write(row, 3, manager)
-            worksheet.write(row, 4, project)
+            worksheet.write_row(row, 2, [self.users[email], manager, project])
             worksheet.write(
                 row,
                 5,
-                sum(
-                    [
-                        self.sumstandby[hotline, email, project][date]
-                        for date in self.sumstandby[hotline, email, project].keys()
-                    ]
+                hours_to_number(
+                    sum(
+                        [
+                            self.data.sumstandby[hotline, email, project][date]
+                            for date in self.data.sumstandby[hotline, email, project].keys()
+                        ]
+                    )
                 ),
                 self.cellFormats["datanum"],
             )
@@ -95,35 +63,39 @@ class SGStandby(SGStandbyLimiter):
         worksheet.autofilter(1, 0, row - 1, col - 1)
 
         row += 4
-        for hotline in sorted(self.sumhotline.keys()):
+        for hotline in sorted(self.data.sumhotline.keys()):
+            cells = []
             date = self.min_date
-            col = 6
             while date <= self.max_date:
-                hours = self.sumhotline[hotline].get(date, dec(0))
+                hours = self.data.sumhotline[hotline].get(date, 0)
 
                 if hours > 0:
-                    expectedHours = 16 if self.is_working_day(date) else 24
+                    expectedHours = (16 if self.is_working_day(date) else 24) * HOUR
                     hourFormat = HourFormat.WORK
                     if hours < expectedHours:
                         hourFormat = HourFormat.UNDER
                     elif hours > expectedHours:
                         hourFormat = HourFormat.OVER
-                    worksheet.write_number(row, col, dec_to_number(hours), self.cellFormats["hourFormats"][hourFormat])
+                    cells.append((hours_to_number(hours), hourFormat))
+                else:
+                    cells.append((None, None))
 
                 date = date + td(days=1)
-                col += 1
+            self.writeRow(worksheet, row, 6, cells, self.cellFormats["hourFormats"])
 
             worksheet.write(row, 0, hotline)
             worksheet.write(
                 row,
                 5,
-                sum([self.sumhotline[hotline][date] for date in self.sumhotline[hotline].keys()]),
+                hours_to_number(
+                    sum([self.data.sumhotline[hotline][date] for date in self.data.sumhotline[hotline].keys()])
+                ),
                 self.cellFormats["datanum"],
             )
 
             row += 1
 
     def generateSheet(self, workbook):
-        worksheet = workbook.add_worksheet("Standby")
+        worksheet = workbook.add_worksheet(self.SHEET_NAME)
         self.generateHeader(worksheet)
         self.generateData(worksheet)
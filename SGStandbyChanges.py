@@ -1,12 +1,16 @@
 from datetime import timedelta as td
-from common import HourType, HourFormat
+from common import HourType, HourFormat, HOUR, hours_to_number
 from config import Config
+from Aggregator import Aggregator
 from SGStandbyLimiter import SGStandbyLimiter
 
 
 class SGStandbyChanges(SGStandbyLimiter):
-    def __init__(self, config: Config, cellFormats, standbylimit, managerFromConfig) -> None:
-        super().__init__(config, cellFormats, standbylimit)
+    SHEET_NAME = "Payroll (standby changes)"
+    VIEWS = {"sumbyuser"}
+
+    def __init__(self, config: Config, cellFormats, data: Aggregator, standbylimit, managerFromConfig) -> None:
+        super().__init__(config, cellFormats, data, standbylimit)
         self.managerFromConfig = managerFromConfig
 
     def generateTitle(self, worksheet):
@@ -32,14 +36,13 @@ class SGStandbyChanges(SGStandbyLimiter):
 
     def generateHeader(self, worksheet):
         row = 1
+        self.generateHeaderDays(worksheet, row, 6)
         self.generateCommonColumnHeaders(worksheet, row, 0)
         self.generateColumnHeader(worksheet, row, 3, "Comment", self.cellFormats["headertxt"], 24)
-        for i, headerText in enumerate(["Stby-", "Work+"]):
-            self.generateColumnHeader(worksheet, row, 4 + i, headerText, self.cellFormats["headernum"], 8)
-        self.generateHeaderDays(worksheet, row, 6)
+        self.generateColumnHeaders(worksheet, row, 4, ["Stby-", "Work+"], self.cellFormats["headernum"], 8)
 
-    def getWorkCellFormat(self, date, hours):
-        normhours = 8 if self.is_working_day(date) else 0
+    def getWorkCellFormat(self, email, date, hours):
+        normhours = 8 * HOUR if self.is_working_day(date, email) else 0
         if hours < normhours:
             return self.cellFormats["hourFormats"][HourFormat.UNDER]
         elif hours > normhours:
@@ -51,15 +54,13 @@ class SGStandbyChanges(SGStandbyLimiter):
         row = 2
 
         for email in sorted(self.sumstandbydec):
-            worksheet.write(row + 0, 3, "Standby before")
-            worksheet.write(row + 1, 3, "Standby reduction")
-            worksheet.write(row + 2, 3, "Standby after")
-            worksheet.write(row + 3, 3, "Work before")
-            worksheet.write(row + 4, 3, "Work addition")
-            worksheet.write(row + 5, 3, "Work after")
+            # the six rows of a user are built fully before writing them, so that rows are written in order. Each row
+            # holds the (hours, format) of the columns from 4 on, None hours are left empty
+            ndays = (self.max_date - self.min_date).days + 1
+            cells = [[(None, None)] * (2 + ndays) for _ in range(6)]
 
             date = self.min_date
-            col = 6
+            col = 2
             while date <= self.max_date:
                 standbyafter = 0
                 workafter = 0
@@ -67,41 +68,29 @@ class SGStandbyChanges(SGStandbyLimiter):
                 if date in self.sumbyuser[email].keys():
                     standbyafter = self.sumbyuser[email][date].get(HourType.STANDBY, 0)
                     if standbyafter > 0:
-                        worksheet.write_number(
-                            row + 0, col, standbyafter, self.cellFormats["hourFormats"][HourFormat.STANDBY]
-                        )
-                        worksheet.write_number(
-                            row + 2, col, standbyafter, self.cellFormats["hourFormats"][HourFormat.STANDBY]
-                        )
+                        cells[0][col] = (standbyafter, self.cellFormats["hourFormats"][HourFormat.STANDBY])
+                        cells[2][col] = (standbyafter, self.cellFormats["hourFormats"][HourFormat.STANDBY])
 
                     workafter = self.sumbyuser[email][date].get(HourType.WORK, 0)
                     if workafter > 0:
-                        worksheet.write_number(row + 3, col, workafter, self.getWorkCellFormat(date, workafter))
-                        worksheet.write_number(row + 5, col, workafter, self.getWorkCellFormat(date, workafter))
+                        cells[3][col] = (workafter, self.getWorkCellFormat(email, date, workafter))
+                        cells[5][col] = (workafter, self.getWorkCellFormat(email, date, workafter))
 
                 if date in self.sumstandbydec[email].keys():
                     standbyreduction = self.sumstandbydec[email][date]
-                    worksheet.write_number(
-                        row + 1, col, standbyreduction, self.cellFormats["hourFormats"][HourFormat.EMPTY]
-                    )
-                    worksheet.write_number(
-                        row + 0,
-                        col,
+                    cells[1][col] = (standbyreduction, self.cellFormats["hourFormats"][HourFormat.EMPTY])
+                    cells[0][col] = (
                         standbyafter - standbyreduction,
                         self.cellFormats["hourFormats"][HourFormat.STANDBY],
                     )
 
                 if date in self.sumworkinc[email].keys():
                     workaddition = self.sumworkinc[email][date]
-                    worksheet.write_number(
-                        row + 4, col, workaddition, self.cellFormats["hourFormats"][HourFormat.EMPTY]
-                    )
+                    cells[4][col] = (workaddition, self.cellFormats["hourFormats"][HourFormat.EMPTY])
                     if workafter - workaddition >= 0:
-                        worksheet.write_number(
-                            row + 3,
-                            col,
+                        cells[3][col] = (
                             workafter - workaddition,
-                            self.getWorkCellFormat(date, workafter - workaddition),
+                            self.getWorkCellFormat(email, date, workafter - workaddition),
                         )
 
                 date = date + td(days=1)
@@ -112,16 +101,29 @@ class SGStandbyChanges(SGStandbyLimiter):
                 if email in self.config.UserData.keys():
                     manager = self.config.UserData[email]["Reporting to"]
 
-            for rd in range(0, 6):
-                worksheet.write(row + rd, 0, email, self.cellFormats["datatxt"])
-                worksheet.write(row + rd, 1, self.users[email])
-                worksheet.write(row + rd, 2, manager)
-
             s = sum([self.sumstandbydec[email][date] for date in self.sumstandbydec[email].keys()])
-            worksheet.write_number(row + 1, 4, s, self.cellFormats["datanum"])
+            cells[1][0] = (s, self.cellFormats["datanum"])
 
             w = sum([self.sumworkinc[email][date] for date in self.sumworkinc[email].keys()])
-            worksheet.write_number(row + 4, 5, w, self.cellFormats["datanum"])
+            cells[4][1] = (w, self.cellFormats["datanum"])
+
+            comments = [
+                "Standby before",
+                "Standby reduction",
+                "Standby after",
+                "Work before",
+                "Work addition",
+                "Work after",
+            ]
+            for rd in range(0, 6):
+                worksheet.write(row + rd, 0, email, self.cellFormats["datatxt"])
+                worksheet.write_row(row + rd, 1, [self.users[email], manager, comments[rd]])
+                self.writeRow(
+                    worksheet,
+                    row + rd,
+                    4,
+                    [(None if value is None else hours_to_number(value), format) for value, format in cells[rd]],
+                )
 
             row += 6
 
@@ -131,7 +133,7 @@ class SGStandbyChanges(SGStandbyLimiter):
     def generateSheet(self, workbook):
         if self.standbylimit:
             self.limitStandby()
-        worksheet = workbook.add_worksheet("Payroll (standby changes)")
+        worksheet = workbook.add_worksheet(self.SHEET_NAME)
         self.generateTitle(worksheet)
         self.generateHeader(worksheet)
         self.generateData(worksheet)
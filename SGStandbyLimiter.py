@@ -1,40 +1,27 @@
-from datetime import datetime as dt
-from decimal import Decimal as dec
 from config import Config
-from common import HourType
+from common import HourType, HOUR
 from SheetGenerator import SheetGenerator
+from Aggregator import Aggregator
 
 
 class SGStandbyLimiter(SheetGenerator):
     MONTHLYSTANDBYLIMIT = 168
 
-    def __init__(self, config: Config, cellFormats, standbylimit) -> None:
-        super().__init__(config, cellFormats)
+    def __init__(self, config: Config, cellFormats, data: Aggregator, standbylimit) -> None:
+        super().__init__(config, cellFormats, data)
         self.standbylimit = standbylimit
-        self.sumbyuser = {}
-        self.sumstandbydec = {}
-        self.sumworkinc = {}
-
-    def loadRow(self, row):
-        super().loadRow(row)
-
-        # Assumption: if first field can be parsed as date, then it is a data row
-        date = None
-        try:
-            date = dt.strptime(row["Date"], "%Y%m%d")
-        except ValueError:
-            return
 
-        email = row["Email Address"].lower()
+    @property
+    def sumbyuser(self):
+        return self.data.sumbyuser
 
-        t = self.get_hour_type(row["Project"], row["Activity"])
+    @property
+    def sumstandbydec(self):
+        return self.data.sumstandbydec
 
-        # sumbyuser update
-        if email not in self.sumbyuser.keys():
-            self.sumbyuser[email] = {}
-        if date not in self.sumbyuser[email].keys():
-            self.sumbyuser[email][date] = {}
-        self.sumbyuser[email][date][t] = self.sumbyuser[email][date].get(t, 0) + dec(row["Hours"])
+    @property
+    def sumworkinc(self):
+        return self.data.sumworkinc
 
     def tryConvertingStandbyToWork(self, email, date):
         minusstandby = 0
@@ -42,19 +29,21 @@ class SGStandbyLimiter(SheetGenerator):
         # exchange rate between standby and overtime hours
         # weekday: 15 standby = 2 overtime
         # weekend: 20 standby = 1 overtime
-        sbyunit = 15 if self.is_working_day(date) else 10
-        ovtunit = 2 if self.is_working_day(date) else 1
+        sbyunit = (15 if self.is_working_day(date, email) else 10) * HOUR
+        ovtunit = (2 if self.is_working_day(date, email) else 1) * HOUR
 
-        if self.sumbyuser[email][date].get(HourType.STANDBY, 0) >= sbyunit:
-            w1 = self.sumbyuser[email][date].get(HourType.WORK, 0)
-            s1 = self.sumbyuser[email][date].get(HourType.STANDBY, 0)
+        hours = self.sumbyuser[email][date]
+        if hours.get(HourType.STANDBY, 0) >= sbyunit:
+            w1 = hours.get(HourType.WORK, 0)
+            s1 = hours.get(HourType.STANDBY, 0)
             numunit = s1 // sbyunit
             pluswork = numunit * ovtunit
             minusstandby = numunit * sbyunit
             w2 = w1 + pluswork
             s2 = s1 - minusstandby
-            self.sumbyuser[email][date][HourType.WORK] = w2
-            self.sumbyuser[email][date][HourType.STANDBY] = s2
+            hours[HourType.WORK] = w2
+            hours[HourType.STANDBY] = s2
+            self.data.storeUserDay(email, date, hours)
 
             if email not in self.sumstandbydec.keys():
                 self.sumstandbydec[email] = {}
@@ -67,38 +56,35 @@ class SGStandbyLimiter(SheetGenerator):
         return minusstandby
 
     def limitStandby(self):
-        for email in self.sumbyuser:
-            # avoid importing dateutil.relativedelta for now...
-            year = self.min_date.year
-            month = self.min_date.month
-            while year < self.max_date.year or (year == self.max_date.year and month <= self.max_date.month):
-                monthlystandy = sum(
-                    [
-                        self.sumbyuser[email][d].get(HourType.STANDBY, 0)
-                        for d in self.sumbyuser[email]
-                        if d.year == year and d.month == month
-                    ]
-                )
-
-                if monthlystandy > self.MONTHLYSTANDBYLIMIT:
-                    # first try converting standby hours to overtime on weekends
-                    for date in self.sumbyuser[email]:
-                        if date.year == year and date.month == month:
-                            if not self.is_working_day(date):
-                                monthlystandy -= self.tryConvertingStandbyToWork(email, date)
-                                if monthlystandy <= self.MONTHLYSTANDBYLIMIT:
-                                    break
-
-                    # if limit is still exceeded, try converting standby hours to overtime on weekdays
-                    if monthlystandy > self.MONTHLYSTANDBYLIMIT:
-                        for date in self.sumbyuser[email]:
-                            if date.year == year and date.month == month:
-                                if self.is_working_day(date):
-                                    monthlystandy -= self.tryConvertingStandbyToWork(email, date)
-                                    if monthlystandy <= self.MONTHLYSTANDBYLIMIT:
-                                        break
-
-                month += 1
-                if month == 13:
-                    year += 1
-                    month = 1
+        # sumbyuser is shared by all generators, so adjust it only once per dataset
+        if self.data.standbyLimited:
+            return
+        self.data.standbyLimited = True
+
+        # the monthly standby totals and the days of each month are kept at ingest, so only months over the limit
+        # are visited, in the order their days were first seen
+        limit = self.MONTHLYSTANDBYLIMIT * HOUR
+        for email, months in self.data.standbymonthly.items():
+            for ym, monthlystandby in months.items():
+                if monthlystandby <= limit:
+                    continue
+                days = self.data.daysbymonth[email][ym]
+
+                # first try converting standby hours to overtime on weekends
+                for date in days:
+                    if not self.is_working_day(date, email):
+                        monthlystandby -= self.tryConvertingStandbyToWork(email, date)
+                        if monthlystandby <= limit:
+                            break
+
+                # if limit is still exceeded, try converting standby hours to overtime on weekdays
+                if monthlystandby > limit:
+                    for date in days:
+                        if self.is_working_day(date, email):
+                            monthlystandby -= self.tryConvertingStandbyToWork(email, date)
+                            if monthlystandby <= limit:
+                                break
+
+                months[ym] = monthlystandby
+
+        self.data.flush()
@@ -0,0 +1,370 @@
+import os
+import sqlite3
+import tempfile
+from collections.abc import Mapping
+from datetime import datetime as dt
+from common import HourType
+from config import Config
+from Aggregator import Aggregator
+from timesheet import TimesheetRow
+
+SCHEMA = """
+CREATE TABLE byuser (email TEXT, date INTEGER, ym INTEGER, ht INTEGER, hours INTEGER,
+    PRIMARY KEY (email, date, ht)) WITHOUT ROWID;
+CREATE TABLE userdays (email TEXT, date INTEGER, ym INTEGER, seq INTEGER,
+    PRIMARY KEY (email, date)) WITHOUT ROWID;
+CREATE TABLE projectactivity (email TEXT, project TEXT, activity TEXT, date INTEGER, ht INTEGER, hours INTEGER,
+    PRIMARY KEY (email, project, activity, date, ht)) WITHOUT ROWID;
+CREATE TABLE projectmonthly (email TEXT, project TEXT, activity TEXT, ym INTEGER, ht INTEGER, hours INTEGER,
+    PRIMARY KEY (email, project, activity, ym, ht)) WITHOUT ROWID;
+CREATE TABLE standby (hotline TEXT, email TEXT, project TEXT, date INTEGER, hours INTEGER,
+    PRIMARY KEY (hotline, email, project, date)) WITHOUT ROWID;
+CREATE TABLE hotline (hotline TEXT, date INTEGER, hours INTEGER,
+    PRIMARY KEY (hotline, date)) WITHOUT ROWID;
+CREATE TABLE workmonthly (email TEXT, ym INTEGER, kind INTEGER, name TEXT, hours INTEGER,
+    PRIMARY KEY (email, ym, kind, name)) WITHOUT ROWID;
+"""
+
+# table -> (columns, key columns) of the summed tables, their last column is the hours
+TABLES = {
+    "byuser": (("email", "date", "ym", "ht", "hours"), ("email", "date", "ht")),
+    "projectactivity": (
+        ("email", "project", "activity", "date", "ht", "hours"),
+        ("email", "project", "activity", "date", "ht"),
+    ),
+    "projectmonthly": (
+        ("email", "project", "activity", "ym", "ht", "hours"),
+        ("email", "project", "activity", "ym", "ht"),
+    ),
+    "standby": (("hotline", "email", "project", "date", "hours"), ("hotline", "email", "project", "date")),
+    "hotline": (("hotline", "date", "hours"), ("hotline", "date")),
+    "workmonthly": (("email", "ym", "kind", "name", "hours"), ("email", "ym", "kind", "name")),
+}
+
+# kinds of the names of a month of workmonthly, its projects and activities are stored as separate sets, the work
+# hours are added to the projects
+PROJECT = 0
+ACTIVITY = 1
+
+
+def upsert(table, update="hours + excluded.hours"):
+    columns, keys = TABLES[table]
+    return (
+        f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET hours = {update}"
+    )
+
+
+_dates = {}
+
+
+def to_date(ordinal):
+    # dates are stored as ordinals, the datetime objects of the views are shared like the parsed ones
+    date = _dates.get(ordinal)
+    if date is None:
+        date = _dates[ordinal] = dt.fromordinal(ordinal)
+    return date
+
+
+def to_ym(ym):
+    return divmod(ym, 100)
+
+
+def daily(rows):
+    # (date, ht, hours) -> date -> HourType -> hours
+    days = {}
+    for date, ht, hours in rows:
+        days.setdefault(to_date(date), {})[HourType(ht)] = hours
+    return days
+
+
+def monthly(rows):
+    # (ym, ht, hours) -> (year, month) -> HourType -> hours
+    months = {}
+    for ym, ht, hours in rows:
+        months.setdefault(to_ym(ym), {})[HourType(ht)] = hours
+    return months
+
+
+def dated(rows):
+    # (date, hours) -> date -> hours
+    return {to_date(date): hours for date, hours in rows}
+
+
+def workmonthly(rows):
+    # (ym, kind, name, hours) -> (year, month) -> {"projects", "activities", "work_hours"}
+    months = {}
+    for ym, kind, name, hours in rows:
+        month = months.setdefault(to_ym(ym), {"projects": set(), "activities": set(), "work_hours": 0})
+        month["projects" if kind == PROJECT else "activities"].add(name)
+        month["work_hours"] += hours
+    return months
+
+
+def standbymonthly(rows):
+    # (ym, hours) -> (year, month) -> standby hours
+    return {to_ym(ym): hours for ym, hours in rows}
+
+
+def daysbymonth(rows):
+    # (ym, date) in first seen order -> (year, month) -> dates
+    months = {}
+    for ym, date in rows:
+        months.setdefault(to_ym(ym), []).append(to_date(date))
+    return months
+
+
+class SQLiteView(Mapping):
+    """Read-only mapping of the outer keys of an Aggregator view to its nested values, queried from a table of the
+    SQLiteAggregator. Only the keys and the value of the last key looked up are held in memory.
+    """
+
+    def __init__(self, data, table, keys, columns, build, where="", tail=""):
+        self.data = data
+        self.table = table
+        self.keys_ = keys
+        self.build = build
+        self.where = f" AND {where}" if where else ""
+        condition = " AND ".join(f"{k} = ?" for k in keys)
+        self.valueQuery = f"SELECT {columns} FROM {table} WHERE {condition}{self.where} {tail}"
+        self.containsQuery = f"SELECT 1 FROM {table} WHERE {condition}{self.where} LIMIT 1"
+        self.keysQuery = (
+            f"SELECT DISTINCT {', '.join(keys)} FROM {table} WHERE 1{self.where} ORDER BY {', '.join(keys)}"
+        )
+        self.last = None
+
+    def query(self, sql, parameters=()):
+        return self.data.connection().execute(sql, parameters)
+
+    def params(self, key):
+        return key if len(self.keys_) > 1 else (key,)
+
+    def __iter__(self):
+        # the keys come in sorted order
+        rows = self.query(self.keysQuery).fetchall()
+        if len(self.keys_) > 1:
+            return iter(rows)
+        return (row[0] for row in rows)
+
+    def __len__(self):
+        return self.query(f"SELECT COUNT(*) FROM ({self.keysQuery})").fetchone()[0]
+
+    def __contains__(self, key):
+        if self.last is not None and self.last[0] == key:
+            return True
+        return self.query(self.containsQuery, self.params(key)).fetchone() is not None
+
+    def __getitem__(self, key):
+        if self.last is not None and self.last[0] == key:
+            return self.last[1]
+        rows = self.query(self.valueQuery, self.params(key)).fetchall()
+        if len(rows) == 0:
+            raise KeyError(key)
+        self.last = (key, self.build(rows))
+        return self.last[1]
+
+    def __getstate__(self):
+        return {**self.__dict__, "last": None}
+
+
+class SQLiteAggregator(Aggregator):
+    """Aggregation backend keeping the views of the Aggregator in a temporary SQLite database instead of in memory,
+    for exports too large to aggregate in RAM.
+
+    loadRow sums the rows into buffers that are added to the database once they are large, or before the first view
+    is read. The views are read-only mappings with the keys and nested values of the in-memory views, each value is
+    queried when it is looked up. Users, approvers and the date range are still kept in memory.
+    """
+
+    FLUSH_ROWS = 200000
+
+    def __init__(self, config: Config, views=Aggregator.VIEWS, directory=None):
+        super().__init__(config, views)
+        self.tempdir = tempfile.TemporaryDirectory(prefix="psg-", dir=directory)
+        self.path = os.path.join(self.tempdir.name, "sums.sqlite")
+        self.pid = None
+        self.db = None
+        self.buffers = {table: {} for table in TABLES}
+        self.userdays = {}
+        self.userdayseq = 0
+        self.buffered = 0
+        self.stored = {}
+        self.connection().executescript(SCHEMA)
+
+        self.sumbyuser = SQLiteView(self, "byuser", ("email",), "date, ht, hours", daily, tail="ORDER BY date")
+        self.sumprojectactivity = SQLiteView(
+            self, "projectactivity", ("email", "project", "activity"), "date, ht, hours", daily, tail="ORDER BY date"
+        )
+        self.sumprojectmonthly = SQLiteView(
+            self, "projectmonthly", ("email", "project", "activity"), "ym, ht, hours", monthly, tail="ORDER BY ym"
+        )
+        self.sumstandby = SQLiteView(
+            self, "standby", ("hotline", "email", "project"), "date, hours", dated, tail="ORDER BY date"
+        )
+        self.sumhotline = SQLiteView(self, "hotline", ("hotline",), "date, hours", dated, tail="ORDER BY date")
+        self.sumworkmonthly = SQLiteView(
+            self, "workmonthly", ("email",), "ym, kind, name, hours", workmonthly, tail="ORDER BY ym"
+        )
+        # only months with standby are listed, the limiter skips the others anyway
+        self.standbymonthly = SQLiteView(
+            self,
+            "byuser",
+            ("email",),
+            "ym, SUM(hours)",
+            standbymonthly,
+            where=f"ht = {HourType.STANDBY.value}",
+            tail="GROUP BY ym ORDER BY ym",
+        )
+        self.daysbymonth = SQLiteView(self, "userdays", ("email",), "ym, date", daysbymonth, tail="ORDER BY seq")
+
+    def connection(self):
+        # connects again in worker processes, as a connection must not be shared with a forked or spawned process;
+        # pending sums are added before any view is read
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.db = sqlite3.connect(self.path, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode = OFF")
+            self.db.execute("PRAGMA synchronous = OFF")
+        self.flush()
+        return self.db
+
+    def flush(self):
+        if self.buffered == 0 and len(self.stored) == 0:
+            return
+        buffers, self.buffers = self.buffers, {table: {} for table in TABLES}
+        userdays, self.userdays = self.userdays, {}
+        stored, self.stored = self.stored, {}
+        self.buffered = 0
+
+        db = self.connection()
+        db.execute("BEGIN")
+        for table, sums in buffers.items():
+            if len(sums) > 0:
+                db.executemany(upsert(table), [(*key, hours) for key, hours in sums.items()])
+        if len(userdays) > 0:
+            # a day already stored keeps the position it was first seen at
+            db.executemany("INSERT OR IGNORE INTO userdays VALUES (?, ?, ?, ?)", [(*k, v) for k, v in userdays.items()])
+        if len(stored) > 0:
+            db.executemany(upsert("byuser", "excluded.hours"), [(*key, hours) for key, hours in stored.items()])
+        db.execute("COMMIT")
+
+    def add(self, table, key, hours):
+        sums = self.buffers[table]
+        if key in sums:
+            sums[key] += hours
+        else:
+            sums[key] = hours
+            self.buffered += 1
+
+    def loadRow(self, row: TimesheetRow):
+        date = row.date
+        email = row.email
+        t = row.hourtype
+        hours = row.hours
+        project = row.label
+        activity = row.activity
+
+        if email not in self.users.keys():
+            self.users[email] = row.user
+        if email not in self.approvers.keys():
+            self.approvers[email] = row.approver
+
+        self.min_date = min(self.min_date, date)
+        self.max_date = max(self.max_date, date)
+
+        day = date.toordinal()
+        ym = date.year * 100 + date.month
+        ht = t.value
+        if self.doByUser:
+            self.add("byuser", (email, day, ym, ht), hours)
+            if (email, day, ym) not in self.userdays:
+                self.userdays[email, day, ym] = self.userdayseq
+                self.userdayseq += 1
+                self.buffered += 1
+
+        if self.doProjectActivity:
+            self.add("projectactivity", (email, project, activity, day, ht), hours)
+
+        if self.doProjectMonthly:
+            self.add("projectmonthly", (email, project, activity, ym, ht), hours)
+
+        if t is HourType.STANDBY:
+            hotline = self.config.Hotlines.get(email, "?")
+            if self.doStandby:
+                self.add("standby", (hotline, email, project, day), hours)
+            if self.doHotline:
+                self.add("hotline", (hotline, day), hours)
+
+        if t == HourType.WORK and self.doWorkMonthly:
+            self.add("workmonthly", (email, ym, PROJECT, project), hours)
+            self.add("workmonthly", (email, ym, ACTIVITY, activity), 0)
+
+        if self.buffered >= self.FLUSH_ROWS:
+            self.connection()
+
+    def merge(self, other):
+        # other is an in-memory Aggregator of the rows following the loaded ones, e.g. of a chunk of the export
+        for email, user in other.users.items():
+            self.users.setdefault(email, user)
+        for email, approver in other.approvers.items():
+            self.approvers.setdefault(email, approver)
+        self.min_date = min(self.min_date, other.min_date)
+        self.max_date = max(self.max_date, other.max_date)
+
+        for email, months in other.daysbymonth.items():
+            for ym, dates in months.items():
+                for date in dates:
+                    key = (email, date.toordinal(), date.year * 100 + date.month)
+                    if key not in self.userdays:
+                        self.userdays[key] = self.userdayseq
+                        self.userdayseq += 1
+                        self.buffered += 1
+        for email, days in other.sumbyuser.items():
+            for date, hours in days.items():
+                for t, h in hours.items():
+                    self.add("byuser", (email, date.toordinal(), date.year * 100 + date.month, t.value), h)
+        for (email, project, activity), days in other.sumprojectactivity.items():
+            for date, hours in days.items():
+                for t, h in hours.items():
+                    self.add("projectactivity", (email, project, activity, date.toordinal(), t.value), h)
+        for (email, project, activity), months in other.sumprojectmonthly.items():
+            for (year, month), hours in months.items():
+                for t, h in hours.items():
+                    self.add("projectmonthly", (email, project, activity, year * 100 + month, t.value), h)
+        for (hotline, email, project), days in other.sumstandby.items():
+            for date, h in days.items():
+                self.add("standby", (hotline, email, project, date.toordinal()), h)
+        for hotline, days in other.sumhotline.items():
+            for date, h in days.items():
+                self.add("hotline", (hotline, date.toordinal()), h)
+        # the view only has the total work hours of a month, not those of each project, so they are added to one of
+        # the projects, the view reads the same
+        for email, months in other.sumworkmonthly.items():
+            for (year, month), m in months.items():
+                ym = year * 100 + month
+                for i, project in enumerate(sorted(m["projects"])):
+                    self.add("workmonthly", (email, ym, PROJECT, project), m["work_hours"] if i == 0 else 0)
+                for activity in m["activities"]:
+                    self.add("workmonthly", (email, ym, ACTIVITY, activity), 0)
+
+        if self.buffered >= self.FLUSH_ROWS:
+            self.flush()
+
+    def storeUserDay(self, email, date, hours):
+        day = date.toordinal()
+        ym = date.year * 100 + date.month
+        for t, h in hours.items():
+            self.stored[email, day, ym, t.value] = h
+
+    def close(self):
+        if self.db is not None and self.pid == os.getpid():
+            self.db.close()
+        self.db = None
+        self.pid = None
+        if self.tempdir is not None:
+            self.tempdir.cleanup()
+
+    def __getstate__(self):
+        # worker processes connect to the database again and do not own its folder
+        self.connection()
+        return {**self.__dict__, "db": None, "pid": None, "tempdir": None}
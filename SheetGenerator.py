@@ -1,32 +1,46 @@
 from abc import abstractmethod
-from datetime import datetime as dt, timedelta as td
+from datetime import timedelta as td
 import calendar
-from common import HourType, HourFormat
+from common import HourType, HourFormat, HOUR, hours_to_number
 from config import Config
+from Aggregator import Aggregator
 
 
 class SheetGenerator:
-    def __init__(self, config: Config, cellFormats):
+    # Generators write rows strictly top to bottom (any column order within a row), so that the workbook can be
+    # streamed with xlsxwriter's constant_memory option. Rows written out of order would be silently dropped there.
+
+    # name of the generated worksheet
+    SHEET_NAME = None
+    # Aggregator views read by the generator, only these are kept when sheets are selected
+    VIEWS = set()
+
+    def __init__(self, config: Config, cellFormats, data: Aggregator):
         self.config = config
         self.cellFormats = cellFormats
+        self.data = data
+
+    @property
+    def users(self):
+        return self.data.users
+
+    @property
+    def approvers(self):
+        return self.data.approvers
+
+    @property
+    def min_date(self):
+        return self.data.min_date
 
-        self.users = {}
-        self.approvers = {}
-        self.min_date = dt.max
-        self.max_date = dt.min
+    @property
+    def max_date(self):
+        return self.data.max_date
 
     def get_hour_type(self, project, activity) -> HourType:
-        if project in self.config.SpecialProjects.keys():
-            return self.config.SpecialProjects[project]
-        elif activity == "Standby Hours - Hungary":
-            return HourType.STANDBY
-        else:
-            return HourType.WORK
+        return self.config.get_hour_type(project, activity)
 
-    def is_working_day(self, date) -> bool:
-        return ((date.weekday() < 5) and (date not in self.config.Weekends) and (date not in self.config.Holidays)) or (
-            date in self.config.Workingdays
-        )
+    def is_working_day(self, date, email=None) -> bool:
+        return self.config.get_calendar(email).is_working_day(date)
 
     def get_only_hours(self, hour_type, hours):
         if hour_type not in hours:
@@ -38,19 +52,19 @@ class SheetGenerator:
     def get_active_hours(self, hours):
         return sum([hours[ht] for ht in hours if ht != HourType.STANDBY])
 
-    def get_day_cell(self, date, hours):
+    def get_day_cell(self, date, hours, email=None):
         w = self.get_only_hours(HourType.WORK, hours)
-        if self.is_working_day(date):
+        if self.is_working_day(date, email):
             if w is not None:
-                if w == 8:
-                    return w, HourFormat.WORK
-                elif w < 8:
-                    return w, HourFormat.UNDER
+                if w == 8 * HOUR:
+                    return hours_to_number(w), HourFormat.WORK
+                elif w < 8 * HOUR:
+                    return hours_to_number(w), HourFormat.UNDER
                 else:
-                    return w, HourFormat.OVER
-            elif self.get_only_hours(HourType.VACATION, hours) == 8:
+                    return hours_to_number(w), HourFormat.OVER
+            elif self.get_only_hours(HourType.VACATION, hours) == 8 * HOUR:
                 return "V", HourFormat.VACATION
-            elif self.get_only_hours(HourType.SICK, hours) == 8:
+            elif self.get_only_hours(HourType.SICK, hours) == 8 * HOUR:
                 return "S", HourFormat.SICK
             elif self.get_active_hours(hours) == 0:
                 return "-", HourFormat.MISS
@@ -58,54 +72,97 @@ class SheetGenerator:
                 return "?", HourFormat.QUESTION
         else:
             if w is not None and w > 0:
-                return w, HourFormat.OVER
-            elif self.get_only_hours(HourType.HOLIDAY, hours) == 8:
+                return hours_to_number(w), HourFormat.OVER
+            elif self.get_only_hours(HourType.HOLIDAY, hours) == 8 * HOUR:
                 return "", HourFormat.EMPTY
             elif self.get_active_hours(hours) == 0:
                 return "", HourFormat.EMPTY
             else:
                 return "?", HourFormat.QUESTION
 
-    def loadRow(self, row):
-        date = None
-        try:
-            date = dt.strptime(row["Date"], "%Y%m%d")
-        except ValueError:
-            return
-
-        email = row["Email Address"].lower()
-
-        if email not in self.users.keys():
-            self.users[email] = row["User"]
-        if email not in self.approvers.keys():
-            self.approvers[email] = row["Level 1 Approver Name (configured)"]
+    def get_day_cells(self, hoursbydate, email=None):
+        cells = []
+        date = self.min_date
+        while date <= self.max_date:
+            cells.append(self.get_day_cell(date, hoursbydate.get(date, {}), email))
+            date = date + td(days=1)
+        return cells
 
-        self.min_date = min(self.min_date, date)
-        self.max_date = max(self.max_date, date)
+    def get_removed_day_cells(self):
+        # day cells of a delta row removed since the previous run
+        days = (self.max_date - self.min_date).days + 1
+        return [("", HourFormat.EMPTY)] * days
 
     @abstractmethod
     def generateSheet(self, workbook):
         pass
 
+    @staticmethod
+    def writeRow(worksheet, row, col, cells, formats=None):
+        """Writes cells, a list of (value, format), from col on with one write_row call per run of adjacent cells of
+        the same format, instead of a write call per cell. Cells with a None value are left out. formats maps the
+        formats of the cells to cell formats if given, e.g. cellFormats["hourFormats"] for HourFormat cells."""
+        start = 0
+        n = len(cells)
+        while start < n:
+            value, format = cells[start]
+            if value is None:
+                start += 1
+                continue
+            end = start + 1
+            while end < n and cells[end][1] == format and cells[end][0] is not None:
+                end += 1
+            values = [value for value, _ in cells[start:end]]
+            worksheet.write_row(row, col + start, values, format if formats is None else formats[format])
+            start = end
+
     def generateColumnHeader(self, worksheet, row, col, headerText, headerFormat, width):
         worksheet.write(row, col, headerText, headerFormat)
         worksheet.set_column(col, col, width=width)
 
+    def generateColumnHeaders(self, worksheet, row, col, headerTexts, headerFormat, width):
+        # adjacent columns of the same format and width
+        worksheet.write_row(row, col, headerTexts, headerFormat)
+        worksheet.set_column(col, col + len(headerTexts) - 1, width=width)
+
     def generateCommonColumnHeaders(self, worksheet, row, col):
         self.generateColumnHeader(worksheet, row, col + 0, "Email", self.cellFormats["headertxt"], 40)
-        self.generateColumnHeader(worksheet, row, col + 1, "Name", self.cellFormats["headertxt"], 24)
-        self.generateColumnHeader(worksheet, row, col + 2, "Manager", self.cellFormats["headertxt"], 24)
+        self.generateColumnHeaders(worksheet, row, col + 1, ["Name", "Manager"], self.cellFormats["headertxt"], 24)
+
+    def get_months(self):
+        # (year, month) of each month of the report window
+        months = []
+        year = self.min_date.year
+        month = self.min_date.month
+        while year < self.max_date.year or (year == self.max_date.year and month <= self.max_date.month):
+            months.append((year, month))
+            month += 1
+            if month == 13:
+                year += 1
+                month = 1
+        return months
+
+    def generateHeaderMonths(self, worksheet, row, col):
+        headerTexts = [f"{year:04}-{month:02}" for year, month in self.get_months()]
+        self.generateColumnHeaders(worksheet, row, col, headerTexts, self.cellFormats["headertxt"], 10)
 
     def generateHeaderDays(self, worksheet, row, col):
+        # writes month names into the row above, so must be called before anything else is written into row
         date = self.min_date
+        c = col
         lastmonth = 0
         while date <= self.max_date:
             if lastmonth != date.month:
                 lastmonth = date.month
-                worksheet.write(row - 1, col, calendar.month_name[date.month], self.cellFormats["headertxt"])
-            cf = (
-                self.cellFormats["headerworkday"] if self.is_working_day(date) else self.cellFormats["headernonworkday"]
-            )
-            self.generateColumnHeader(worksheet, row, col, date.day, cf, 6)
+                worksheet.write(row - 1, c, calendar.month_name[date.month], self.cellFormats["headertxt"])
+            date = date + td(days=1)
+            c += 1
+
+        cells = []
+        date = self.min_date
+        while date <= self.max_date:
+            cells.append((date.day, "headerworkday" if self.is_working_day(date) else "headernonworkday"))
             date = date + td(days=1)
-            col += 1
+        self.writeRow(worksheet, row, col, cells, self.cellFormats)
+        if len(cells) > 0:
+            worksheet.set_column(col, col + len(cells) - 1, width=6)
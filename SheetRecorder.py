@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor
+
+
+class FormatRef:
+    """Placeholder for a cell format, given by its path in the cellFormats dict, e.g. ("hourFormats", HourFormat.WORK).
+
+    Worker processes cannot use the Format objects of the main process workbook, so they generate sheets with
+    FormatRefs, which are resolved to the real formats when the recorded calls are replayed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def resolve(self, cellFormats):
+        f = cellFormats
+        for key in self.path:
+            f = f[key]
+        return f
+
+
+def formatRefs(cellFormats, path=()):
+    # same structure as cellFormats, with a FormatRef in place of each format
+    if isinstance(cellFormats, dict):
+        return {key: formatRefs(value, path + (key,)) for key, value in cellFormats.items()}
+    return FormatRef(path)
+
+
+class RecordingWorksheet:
+    """Records worksheet method calls, so that they can be replayed on a real worksheet."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def __getattr__(self, method):
+        def record(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+
+        return record
+
+
+class RecordingWorkbook:
+    def __init__(self):
+        self.worksheets = []
+
+    def add_worksheet(self, name):
+        worksheet = RecordingWorksheet(name)
+        self.worksheets.append(worksheet)
+        return worksheet
+
+
+def replay(workbook, recorded, cellFormats):
+    def resolve(value):
+        return value.resolve(cellFormats) if isinstance(value, FormatRef) else value
+
+    for name, calls in recorded:
+        worksheet = workbook.add_worksheet(name)
+        for method, args, kwargs in calls:
+            getattr(worksheet, method)(*[resolve(a) for a in args], **{k: resolve(v) for k, v in kwargs.items()})
+
+
+_generators = []
+
+
+def _init_worker(generators):
+    global _generators
+    _generators = generators
+
+
+def _generate(i):
+    workbook = RecordingWorkbook()
+    _generators[i].generateSheet(workbook)
+    return [(worksheet.name, worksheet.calls) for worksheet in workbook.worksheets]
+
+
+def generateSheetsParallel(generators, workbook, cellFormats, jobs):
+    """Generates the sheets in worker processes and writes them into workbook in the original order.
+
+    The generators must have been created with formatRefs(cellFormats). They are passed to each worker once, together
+    with the shared aggregated data they reference, and only the recorded calls are sent back.
+    """
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(generators)), initializer=_init_worker, initargs=(generators,)
+    ) as executor:
+        for recorded in executor.map(_generate, range(len(generators))):
+            replay(workbook, recorded, cellFormats)
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import sqlite3
+from datetime import datetime as dt
+from timesheet import TimesheetReader
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (date INTEGER, email TEXT, user TEXT, approver TEXT, project TEXT,
+    description TEXT, activity TEXT, hours INTEGER);
+CREATE INDEX IF NOT EXISTS rows_date ON rows (date);
+CREATE INDEX IF NOT EXISTS rows_email ON rows (email, date, project, activity);
+CREATE TABLE IF NOT EXISTS imports (digest BLOB PRIMARY KEY, filename TEXT, first INTEGER, last INTEGER,
+    nrows INTEGER, imported TEXT);
+"""
+
+
+class Warehouse:
+    """Persistent store of the rows of all imported timesheet exports, an SQLite database (cfg/warehouse.sqlite by
+    default), so reports of any date window can be generated without parsing the exports again.
+
+    Every data row is stored, like in the RowCache, so user/project filters are applied when the rows are read. An
+    export replaces the stored rows of the period it covers, from its first to its last date, so importing a newer
+    export of an overlapping period drops the rows of the older one. Exports are recognized by a hash of their bytes
+    and only imported once. Rows are indexed by date and by (email, date, project, activity).
+    """
+
+    BATCH = 10000
+
+    def __init__(self, path, reader: TimesheetReader):
+        self.path = path
+        self.reader = reader
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.executescript(SCHEMA)
+
+    @staticmethod
+    def digest(inputfilename):
+        h = hashlib.sha256()
+        with open(inputfilename, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.digest()
+
+    def imported(self, digest):
+        return self.db.execute("SELECT 1 FROM imports WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def import_file(self, inputfilename, records):
+        """Stores records, the TimesheetRows of inputfilename, replacing the rows of the dates it covers. Returns the
+        number of rows stored, None if the export was already imported."""
+        digest = self.digest(inputfilename)
+        if self.imported(digest):
+            return None
+
+        db = self.db
+        db.execute("BEGIN")
+        try:
+            # the rows of the export are added first, the rows they replace are known once its period is
+            start = db.execute("SELECT IFNULL(MAX(rowid), 0) FROM rows").fetchone()[0]
+            first = last = None
+            nrows = 0
+            batch = []
+            for r in records:
+                o = r.date.toordinal()
+                if first is None or o < first:
+                    first = o
+                if last is None or o > last:
+                    last = o
+                batch.append((o, r.email, r.user, r.approver, r.project, r.description, r.activity, r.hours))
+                if len(batch) >= self.BATCH:
+                    db.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                    nrows += len(batch)
+                    batch = []
+            db.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            nrows += len(batch)
+
+            if first is not None:
+                db.execute("DELETE FROM rows WHERE date BETWEEN ? AND ? AND rowid <= ?", (first, last, start))
+            db.execute(
+                "INSERT INTO imports VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, os.path.basename(inputfilename), first, last, nrows, dt.now().isoformat(timespec="seconds")),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return nrows
+
+    def read(self, first=None, last=None):
+        """Yields the stored TimesheetRows from first to last date (both included, None for no limit), in the order
+        they were imported."""
+        normalizer = self.reader.normalizer
+        lo = first.toordinal() if first is not None else 0
+        hi = last.toordinal() if last is not None else dt.max.toordinal()
+        dates = {}
+        cursor = self.db.execute(
+            "SELECT date, email, user, approver, project, description, activity, hours FROM rows "
+            "WHERE date BETWEEN ? AND ? ORDER BY rowid",
+            (lo, hi),
+        )
+        for o, email, user, approver, proj, desc, activity, hours in cursor:
+            if o not in dates:
+                dates[o] = dt.fromordinal(o)
+            yield normalizer.record(dates[o], email, user, approver, proj, desc, activity, hours)
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,2 @@
+"""Benchmarks of psg on synthetic timesheet exports. Run from the psg folder, e.g. 'python -m bench.run' or
+'python -m bench.startup'."""
@@ -0,0 +1,186 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir and script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import argparse
+import gc
+import math
+import tempfile
+import time
+import tracemalloc
+import xlsxwriter
+from Aggregator import Aggregator
+import DayGrid
+import ParallelParser
+from SGStandbyLimiter import SGStandbyLimiter
+from config import Config
+from timesheet import RowNormalizer, TimesheetReader
+from psg import CELL_FORMATS, SHEET_GENERATORS, create_data, create_generators, makeFormats
+from bench.synth import generate_timesheet
+
+
+def stages(config, args, inputfilename, inputrows, outputfilename):
+    """Yields (stage, rows, function) for each stage of a psg run on inputfilename, the functions must be called in
+    the order they are yielded. rows is the number of rows the stage processes, None if it is not row based."""
+    state = {}
+
+    def parse():
+        normalizer = RowNormalizer(config)
+        reader = TimesheetReader(normalizer)
+        state["records"] = [r for r in reader.read_file(inputfilename) if normalizer.classifier.include(r)]
+
+    yield "parse", inputrows, parse
+    nrows = len(state["records"])
+
+    # each generator on its own, filling only the views it reads
+    for g in SHEET_GENERATORS:
+
+        def load(views=g.VIEWS):
+            data = create_data(config, views, args.backend)
+            for record in state["records"]:
+                data.loadRow(record)
+            data.flush()
+            data.close()
+
+        yield f"loadRow {g.__name__}", nrows, load
+
+    def loadAll():
+        state["data"] = create_data(config, Aggregator.VIEWS, args.backend)
+        for record in state["records"]:
+            state["data"].loadRow(record)
+        state["data"].flush()
+        config.index_calendars(state["data"].min_date, state["data"].max_date)
+
+    yield "loadRow (all views)", nrows, loadAll
+
+    if args.parsejobs > 1:
+
+        def parseParallel():
+            data = create_data(config, Aggregator.VIEWS, args.backend)
+            ParallelParser.parseParallel(data, inputfilename, args.parsejobs)
+            data.flush()
+            data.close()
+
+        yield f"parse+loadRow ({args.parsejobs} jobs)", inputrows, parseParallel
+
+    def createWorkbook():
+        state["workbook"] = xlsxwriter.Workbook(outputfilename, {"constant_memory": args.constantmemory})
+        cellFormats = makeFormats(CELL_FORMATS, state["workbook"].add_format)
+        state["generators"] = create_generators(SHEET_GENERATORS, config, cellFormats, state["data"], args)
+
+    yield "create workbook", None, createWorkbook
+
+    def limitStandby():
+        limiter = next(g for g in state["generators"] if isinstance(g, SGStandbyLimiter))
+        limiter.limitStandby()
+
+    yield "limitStandby", None, limitStandby
+
+    for i, g in enumerate(SHEET_GENERATORS):
+        yield f"generateSheet {g.SHEET_NAME}", None, lambda i=i: state["generators"][i].generateSheet(state["workbook"])
+
+    yield "workbook.close()", None, lambda: state["workbook"].close()
+    state["data"].close()
+
+
+def measure(config, args, inputfilename, inputrows, outputfilename):
+    # returns (stage, rows, seconds) of a timed run
+    results = []
+    for stage, rows, function in stages(config, args, inputfilename, inputrows, outputfilename):
+        gc.collect()
+        t = time.perf_counter()
+        function()
+        results.append((stage, rows, time.perf_counter() - t))
+    return results
+
+
+def measure_memory(config, args, inputfilename, inputrows, outputfilename):
+    # returns the peak traced memory of each stage, in a separate run as tracing slows it down
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _, _, function in stages(config, args, inputfilename, inputrows, outputfilename):
+            gc.collect()
+            tracemalloc.reset_peak()
+            function()
+            peaks.append(tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def report(results, peaks):
+    print(f"{'stage':<40} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}")
+    for (stage, rows, seconds), peak in zip(results, peaks or [None] * len(results)):
+        throughput = f"{rows / seconds:12,.0f}" if rows and seconds > 0 else f"{'':12}"
+        memory = f"{peak / 2**20:9.1f}" if peak is not None else f"{'':9}"
+        print(f"{stage:<40} {seconds:9.3f} {throughput} {memory}")
+    print(f"{'total':<40} {sum(r[2] for r in results):9.3f}")
+
+
+parser = argparse.ArgumentParser("bench - psg end-to-end benchmark on synthetic timesheets")
+parser.add_argument(
+    "--scales",
+    default="1000,10000,100000,1000000",
+    help="comma separated approximate row counts of the generated timesheets (default: 1000,10000,100000,1000000)",
+)
+parser.add_argument("-d", "--days", type=int, default=90, help="number of days of the timesheets (default: 90)")
+parser.add_argument("-p", "--projects", type=int, default=20, help="number of projects (default: 20)")
+parser.add_argument("--activities", type=int, default=5, help="number of activities (default: 5)")
+parser.add_argument("--standby", type=float, default=0.1, help="share of users on standby (default: 0.1)")
+parser.add_argument(
+    "--special", type=float, default=0.1, help="share of weekdays booked to special projects (default: 0.1)"
+)
+parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+parser.add_argument("-m", "--managerfromconfig", action="store_true", help="manager from userdata.csv, as psg -m")
+parser.add_argument("-c", "--constantmemory", action="store_true", help="xlsxwriter constant_memory mode, as psg -c")
+parser.add_argument("-n", "--numpy", action="store_true", help="NumPy day-grid sheets, as psg -n")
+parser.add_argument(
+    "--parsejobs", type=int, default=1, help="also time parsing in chunks by this many processes, as psg --parsejobs"
+)
+parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory", help="as psg --backend")
+parser.add_argument("--nomemory", action="store_true", help="skip the peak memory measurement run")
+parser.add_argument("--keep", metavar="DIR", help="keep the generated timesheets and workbooks in DIR")
+
+
+def main():
+    args = parser.parse_args()
+    config = Config()
+    # standby is always limited, as a stage of its own
+    args.standbylimit = True
+    if args.numpy and not DayGrid.available():
+        print("NumPy is not installed, computing day-grid sheets without it")
+        args.numpy = False
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        outdir = args.keep or tmpdir
+        os.makedirs(outdir, exist_ok=True)
+        for scale in [int(s) for s in args.scales.split(",")]:
+            # a user has about 0.85 rows a day, plus standby rows on half of the days
+            users = max(1, math.ceil(scale / (args.days * (0.85 + args.standby / 2))))
+            inputfilename = os.path.join(outdir, f"TimesheetReport_{scale}.txt")
+            outputfilename = os.path.join(outdir, f"sum_{scale}.xlsx")
+            with open(inputfilename, "w", newline="", encoding="utf-8") as f:
+                nrows = generate_timesheet(
+                    f,
+                    users=users,
+                    days=args.days,
+                    projects=args.projects,
+                    activities=args.activities,
+                    standby=args.standby,
+                    special=args.special,
+                    specialProjects=config.SpecialProjects,
+                    seed=args.seed,
+                )
+
+            print(f"\n{nrows} rows, {users} users, {args.days} days")
+            results = measure(config, args, inputfilename, nrows, outputfilename)
+            peaks = None if args.nomemory else measure_memory(config, args, inputfilename, nrows, outputfilename)
+            report(results, peaks)
+
+
+if __name__ == "__main__":
+    main()
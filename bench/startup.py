@@ -0,0 +1,88 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir and script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from bench.synth import generate_timesheet
+
+PSG = os.path.join(script_dir, "psg.py")
+
+
+def scenarios(inputfilename):
+    # (name, command line) of the measured runs, from the bare interpreter to a full workbook of a small timesheet
+    return [
+        ("python -c pass", [sys.executable, "-c", "pass"]),
+        ("psg --help", [sys.executable, PSG, "--help"]),
+        ("psg missing.txt", [sys.executable, PSG, "missing.txt"]),
+        (
+            "psg -f csv --sheets Info",
+            [sys.executable, PSG, "--nocache", "-f", "csv", "--sheets", "Info", inputfilename],
+        ),
+        (
+            "psg --sheets 'Project monthly'",
+            [sys.executable, PSG, "--nocache", "--sheets", "Project monthly", inputfilename],
+        ),
+        ("psg", [sys.executable, PSG, "--nocache", inputfilename]),
+    ]
+
+
+def measure(command, repeat, cwd):
+    # returns the wall times of repeat cold runs of command
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def print_importtime(cwd, top):
+    # slowest imports of 'psg --help' by cumulative time, as reported by python -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", PSG, "--help"], cwd=cwd, capture_output=True, text=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            imports.append((int(fields[1]), fields[2].strip()))
+    print(f"\n{'import (psg --help)':<40} {'cumulative ms':>14}")
+    for us, module in sorted(imports, reverse=True)[:top]:
+        print(f"{module:<40} {us / 1000:14.1f}")
+
+
+parser = argparse.ArgumentParser("startup - psg cold start benchmark")
+parser.add_argument("-r", "--repeat", type=int, default=10, help="runs of each scenario (default: 10)")
+parser.add_argument("--rows", type=int, default=1000, help="approximate rows of the timesheet used (default: 1000)")
+parser.add_argument("--importtime", type=int, default=15, metavar="N", help="list the N slowest imports (default: 15)")
+
+
+def main():
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # psg reads cfg from and writes its outputs into the current folder
+        if os.path.isdir("cfg"):
+            shutil.copytree("cfg", os.path.join(tmpdir, "cfg"))
+        inputfilename = os.path.join(tmpdir, "TimesheetReport_startup.txt")
+        with open(inputfilename, "w", newline="", encoding="utf-8") as f:
+            generate_timesheet(f, users=max(1, args.rows // 80), days=90)
+
+        print(f"{'scenario':<40} {'min s':>9} {'median s':>9}")
+        for name, command in scenarios(inputfilename):
+            times = measure(command, args.repeat, tmpdir)
+            print(f"{name:<40} {min(times):9.3f} {statistics.median(times):9.3f}")
+
+        if args.importtime > 0:
+            print_importtime(tmpdir, args.importtime)
+
+
+if __name__ == "__main__":
+    main()
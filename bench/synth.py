@@ -0,0 +1,120 @@
+import os
+import sys
+
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir and script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import argparse
+import random
+from datetime import date, timedelta as td
+from config import Config
+from timesheet import COLUMNS
+
+STANDBY_ACTIVITY = "Standby Hours - Hungary"
+
+
+def generate_timesheet(
+    f,
+    users=100,
+    days=90,
+    projects=20,
+    activities=5,
+    standby=0.1,
+    special=0.1,
+    specialProjects=None,
+    start=date(2025, 1, 1),
+    seed=1,
+):
+    """Writes a deterministic synthetic TimesheetReport export into f and returns the number of data rows.
+
+    Each user books one or two work rows on weekdays and occasionally works on weekends. A 'special' share of the
+    weekdays is booked to the special projects (vacation, sickness, public holiday; by default those of
+    Config.SpecialProjects), and a 'standby' share of the users are on standby for about half of the days.
+    """
+    rnd = random.Random(seed)
+    if specialProjects is None:
+        specialProjects = Config().SpecialProjects
+    specials = list(specialProjects)
+    projectNames = [(f"P{p:04}", f"Project {p}") for p in range(projects)]
+    activityNames = [f"Activity {a}" for a in range(activities)]
+
+    f.write("\t".join(COLUMNS) + "\n")
+    nrows = 0
+
+    def row(day, u, project, description, activity, hours):
+        nonlocal nrows
+        fields = [
+            day.strftime("%Y%m%d"),
+            f"User{u}@Capgemini.com",
+            f"User {u}",
+            f"Manager {u % 10}",
+            project,
+            description,
+            activity,
+            hours,
+        ]
+        f.write("\t".join(fields) + "\n")
+        nrows += 1
+
+    for u in range(users):
+        onStandby = rnd.random() < standby
+        for d in range(days):
+            day = start + td(days=d)
+            if day.weekday() < 5:
+                if rnd.random() < special:
+                    p = rnd.choice(specials)
+                    row(day, u, p, p, p, "8")
+                else:
+                    p, desc = rnd.choice(projectNames)
+                    h = rnd.choice(["8", "8", "8", "7.5", "4", "9", "8.25"])
+                    row(day, u, p, desc, rnd.choice(activityNames), h)
+                    if h == "4":
+                        p, desc = rnd.choice(projectNames)
+                        row(day, u, p, desc, rnd.choice(activityNames), "4")
+            elif rnd.random() < 0.05:
+                p, desc = rnd.choice(projectNames)
+                row(day, u, p, desc, rnd.choice(activityNames), "5")
+            if onStandby and rnd.random() < 0.5:
+                row(day, u, "HOT1", "Hotline", STANDBY_ACTIVITY, rnd.choice(["16", "24", "15", "10.5"]))
+
+    f.write(f"Total\t\t\t\t\t\t\t{nrows}\n")
+    f.write("\n")
+    return nrows
+
+
+parser = argparse.ArgumentParser("synth - synthetic timesheet export generator")
+parser.add_argument("-u", "--users", type=int, default=100, help="number of users (default: 100)")
+parser.add_argument("-d", "--days", type=int, default=90, help="number of days (default: 90)")
+parser.add_argument("-p", "--projects", type=int, default=20, help="number of projects (default: 20)")
+parser.add_argument("--activities", type=int, default=5, help="number of activities (default: 5)")
+parser.add_argument("--standby", type=float, default=0.1, help="share of users on standby (default: 0.1)")
+parser.add_argument(
+    "--special", type=float, default=0.1, help="share of weekdays booked to special projects (default: 0.1)"
+)
+parser.add_argument(
+    "--start", type=date.fromisoformat, default=date(2025, 1, 1), help="first day (default: 2025-01-01)"
+)
+parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+parser.add_argument("filename", help="timesheet export to write")
+
+
+def main():
+    args = parser.parse_args()
+    with open(args.filename, "w", newline="", encoding="utf-8") as f:
+        nrows = generate_timesheet(
+            f,
+            users=args.users,
+            days=args.days,
+            projects=args.projects,
+            activities=args.activities,
+            standby=args.standby,
+            special=args.special,
+            start=args.start,
+            seed=args.seed,
+        )
+    print(f"Saved: {args.filename} ({nrows} rows)")
+
+
+if __name__ == "__main__":
+    main()
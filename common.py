@@ -2,6 +2,7 @@ from datetime import datetime as dt
 from decimal import Decimal as dec
 from enum import Enum, auto
 
+
 def read_strings(fn, do_strip=False, do_lower=False):
     strings = []
     try:
@@ -43,6 +44,25 @@ def format_hours(hours):
         print(type(hours))
         return "???"
 
+
+# hours are stored as integer hundredths of an hour, and only converted when written into a cell
+HOUR = 100
+
+
+def parse_hours(s):
+    return int((dec(s) * HOUR).to_integral_value())
+
+
+def hours_to_number(h):
+    return h // HOUR if h % HOUR == 0 else h / HOUR
+
+
+def trunc_div(a, b):
+    # integer division rounding towards zero, like int() of a Decimal quotient
+    q = abs(a) // b
+    return q if a >= 0 else -q
+
+
 def dec_to_number(d):
     if d.as_integer_ratio()[1] == 1:
         return int(d)
@@ -57,6 +77,7 @@ def format_date(t):
 def format_datetime(t):
     return dt.strftime(t, "%Y-%m-%d   %H:%M:%S")
 
+
 class HourType(Enum):
     WORK = auto()
     VACATION = auto()
@@ -64,6 +85,7 @@ class HourType(Enum):
     HOLIDAY = auto()
     STANDBY = auto()
 
+
 class HourFormat(Enum):
     WORK = auto()
     UNDER = auto()
@@ -1,6 +1,7 @@
 import os
 import csv
 from common import read_strings, read_dates, HourType
+from workcalendar import WorkCalendar
 
 
 class Config:
@@ -10,6 +11,21 @@ class Config:
         self.Holidays = read_dates(os.path.join("cfg", "holidays.txt"))
         self.Weekends = read_dates(os.path.join("cfg", "weekends.txt"))
         self.Workingdays = read_dates(os.path.join("cfg", "workingdays.txt"))
+
+        # default calendar comes from the cfg folder, named site calendars from cfg/calendars/<name>/
+        self.Calendars = {"": WorkCalendar("", self.Holidays, self.Weekends, self.Workingdays)}
+        dncalendars = os.path.join("cfg", "calendars")
+        if os.path.isdir(dncalendars):
+            for name in sorted(os.listdir(dncalendars)):
+                dn = os.path.join(dncalendars, name)
+                if not os.path.isdir(dn):
+                    continue
+                dates = {}
+                for fn in ["holidays.txt", "weekends.txt", "workingdays.txt"]:
+                    dates[fn] = read_dates(os.path.join(dn, fn)) if os.path.exists(os.path.join(dn, fn)) else []
+                self.Calendars[name] = WorkCalendar(
+                    name, dates["holidays.txt"], dates["weekends.txt"], dates["workingdays.txt"]
+                )
         self.SpecialProjects = {
             "Approved Absence (H)": HourType.VACATION,
             "Vacations": HourType.VACATION,
@@ -18,6 +34,12 @@ class Config:
             "Public Holiday": HourType.HOLIDAY,
         }
 
+        # sheets to generate, all of them if empty; overridden by --sheets
+        self.Sheets = []
+        fnsheets = os.path.join("cfg", "sheets.txt")
+        if os.path.exists(fnsheets):
+            self.Sheets = [s for s in read_strings(fnsheets, do_strip=True) if s]
+
         self.Hotlines = {}
         fnhotlines = os.path.join("cfg", "hotlines.txt")
         if os.path.exists(fnhotlines):
@@ -31,29 +53,61 @@ class Config:
                 if email not in self.Hotlines.keys():
                     self.Hotlines[email] = hotline
 
-        self.Rates = {}
-        fnrates = os.path.join("cfg", "rates.csv")
-        if os.path.exists(fnrates):
-            with open(fnrates, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    grade = row["Grade"].strip()
-                    rate = row["Rate"].strip()
-                    if grade:
-                        self.Rates[grade] = rate
-
-        self.UserData = {}
-        fnuserdata = os.path.join("cfg", "userdata.csv")
-        if os.path.exists(fnuserdata):
-            with open(fnuserdata, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f, delimiter="\t")
-                for row in reader:
-                    email = row["Work Email"].strip()
-                    if not email:
-                        continue
-                    self.UserData[email.lower()] = {
-                        "Employment Status": row["Employment Status"],
-                        "Reporting to": row["Reporting to"],
-                        "Job Title": row["Job Title"],
-                        "Global Grade": row["Global Grade"],
-                    }
+        # rates and user data are only needed by some sheets, so they are read when first used
+        self._rates = None
+        self._userdata = None
+
+    @property
+    def Rates(self):
+        if self._rates is None:
+            self._rates = {}
+            fnrates = os.path.join("cfg", "rates.csv")
+            if os.path.exists(fnrates):
+                with open(fnrates, "r", encoding="utf-8") as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        grade = row["Grade"].strip()
+                        rate = row["Rate"].strip()
+                        if grade:
+                            self._rates[grade] = rate
+        return self._rates
+
+    @property
+    def UserData(self):
+        if self._userdata is None:
+            self._userdata = {}
+            fnuserdata = os.path.join("cfg", "userdata.csv")
+            if os.path.exists(fnuserdata):
+                with open(fnuserdata, "r", encoding="utf-8") as f:
+                    reader = csv.DictReader(f, delimiter="\t")
+                    for row in reader:
+                        email = row["Work Email"].strip()
+                        if not email:
+                            continue
+                        self._userdata[email.lower()] = {
+                            "Employment Status": row["Employment Status"],
+                            "Reporting to": row["Reporting to"],
+                            "Job Title": row["Job Title"],
+                            "Global Grade": row["Global Grade"],
+                            "Calendar": (row.get("Calendar") or "").strip(),
+                        }
+        return self._userdata
+
+    def get_calendar(self, email=None) -> WorkCalendar:
+        if email is not None and email in self.UserData:
+            name = self.UserData[email]["Calendar"]
+            if name in self.Calendars:
+                return self.Calendars[name]
+        return self.Calendars[""]
+
+    def index_calendars(self, min_date, max_date):
+        for c in self.Calendars.values():
+            c.index(min_date, max_date)
+
+    def get_hour_type(self, project, activity) -> HourType:
+        if project in self.SpecialProjects.keys():
+            return self.SpecialProjects[project]
+        elif activity == "Standby Hours - Hungary":
+            return HourType.STANDBY
+        else:
+            return HourType.WORK
@@ -5,13 +5,8 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir and script_dir not in sys.path:
     sys.path.insert(0, script_dir)
 
-import subprocess
 import glob
 import argparse
-from datetime import datetime as dt
-import userpaths
-import csv
-import xlsxwriter
 from SGByUser import SGByUser
 from SGStandbyChanges import SGStandbyChanges
 from SGProjectDaily import SGProjectDaily
@@ -19,33 +14,100 @@ from SGProjectMonthly import SGProjectMonthly
 from SGWorkMonthly import SGWorkMonthly
 from SGStandby import SGStandby
 from SGInfo import SGInfo
+from Aggregator import Aggregator
+from PlainOutput import PlainWorkbook, TeeWorkbook
+import DayGrid
+from timesheet import RowClassifier, RowNormalizer, RowMerger, TimesheetReader
+from RowCache import RowCache
+from Profiler import Profiler
+from SGStandbyLimiter import SGStandbyLimiter
 from config import Config
 from common import HourFormat
 import traceback
+import time
+from datetime import datetime as dt
+
+# xlsxwriter, userpaths, subprocess, cProfile, numpy and the multiprocessing of SheetRecorder are imported only by the
+# code paths using them, so that --help, input errors and plain or single sheet runs start quickly
+
 
-config = Config()
+SHEET_GENERATORS = [SGByUser, SGStandbyChanges, SGProjectDaily, SGProjectMonthly, SGWorkMonthly, SGStandby, SGInfo]
 
 
-# returns true if email to be processed
-def filter_email(email):
-    return len(config.Users) == 0 or email in config.Users or email.replace("@capgemini.com", "") in config.Users
+# sheets of a delta, written with only the changed rows
+DELTA_SHEETS = [SGByUser, SGProjectDaily, SGInfo]
 
 
-# returns true if project to be processed
-def filter_project(project, projectdescription):
-    if len(config.Projects) == 0:
-        return True
+# returns the generator classes of the given sheet names or generator class names, in workbook order
+def select_sheets(names):
+    if len(names) == 0:
+        return SHEET_GENERATORS
+    wanted = {name.strip().lower() for name in names}
+    selected = [g for g in SHEET_GENERATORS if g.__name__.lower() in wanted or g.SHEET_NAME.lower() in wanted]
+    known = {g.__name__.lower() for g in selected} | {g.SHEET_NAME.lower() for g in selected}
+    unknown = [name for name in names if name.strip().lower() not in known]
+    if unknown:
+        print(f"Unknown sheets: {', '.join(unknown)}")
+        print(f"Available sheets: {', '.join(g.SHEET_NAME for g in SHEET_GENERATORS)}")
+        sys.exit(1)
+    return selected
 
-    proj = project.lower()
-    projdesc = projectdescription.lower()
 
-    projectmatch = False
-    for p in config.Projects:
-        if p in proj or p in projdesc:
-            projectmatch = True
-            break
+# creates the given generator classes with the options of args
+def create_generators(generators, config, cellFormats, data, args, profiler=None, delta=None):
+    factories = {
+        SGByUser: lambda: SGByUser(
+            config,
+            cellFormats,
+            data,
+            args.standbylimit,
+            args.managerfromconfig,
+            args.numpy,
+            None if delta is None else delta.emails,
+        ),
+        SGStandbyChanges: lambda: SGStandbyChanges(
+            config, cellFormats, data, args.standbylimit, args.managerfromconfig
+        ),
+        SGProjectDaily: lambda: SGProjectDaily(
+            config, cellFormats, data, args.managerfromconfig, args.numpy, None if delta is None else delta.rows
+        ),
+        SGProjectMonthly: lambda: SGProjectMonthly(config, cellFormats, data, args.managerfromconfig),
+        SGWorkMonthly: lambda: SGWorkMonthly(config, cellFormats, data, args.managerfromconfig),
+        SGStandby: lambda: SGStandby(config, cellFormats, data, args.managerfromconfig),
+        SGInfo: lambda: SGInfo(config, cellFormats, data, profiler),
+    }
+    return [factories[g]() for g in generators]
 
-    return projectmatch
+
+# properties of the cell formats of the xlsx output
+CELL_FORMATS = {
+    "headerday": {"align": "center", "bold": "true"},
+    "headerworkday": {"align": "center", "bold": "true", "font_color": "black"},
+    "headernonworkday": {"align": "center", "bold": "true", "font_color": "red"},
+    "headertxt": {"align": "left", "bold": "true"},
+    "headernum": {"align": "right", "bold": "true"},
+    "datatxt": {"align": "left"},
+    "datanum": {"align": "right", "indent": 1},
+    "datausd": {"align": "right", "indent": 1, "num_format": "#,##0.00"},
+    "hourFormats": {
+        HourFormat.WORK: {"align": "center", "bg_color": "#90ee90"},
+        HourFormat.UNDER: {"align": "center", "bg_color": "#9acd32"},
+        HourFormat.OVER: {"align": "center", "bg_color": "#ffa500"},
+        HourFormat.VACATION: {"align": "center", "bg_color": "#ffff00"},
+        HourFormat.SICK: {"align": "center", "bg_color": "#da70d6"},
+        HourFormat.MISS: {"align": "center", "bg_color": "#d3d3d3"},
+        HourFormat.QUESTION: {"align": "center", "bg_color": "#808080"},
+        HourFormat.EMPTY: {"align": "center", "bg_color": "#ffffff"},
+        HourFormat.STANDBY: {"align": "center", "bg_color": "#9090ee"},
+    },
+}
+
+
+def makeFormats(formats, add_format):
+    # same structure as formats, with the result of add_format(properties) in place of each format
+    if not any(isinstance(value, dict) for value in formats.values()):
+        return add_format(formats)
+    return {key: makeFormats(value, add_format) for key, value in formats.items()}
 
 
 # = {
@@ -63,114 +125,530 @@ def filter_project(project, projectdescription):
 #     }
 # }
 
+
+def day(s):
+    return dt.strptime(s, "%Y-%m-%d")
+
+
 parser = argparse.ArgumentParser("psg - Presence Sheet Generator")
 parser.add_argument(
     "-a",
     "--autoopen",
     action="store_true",
-    help="automatically open generated file with Excel/Writer",
+    help="automatically open generated file with Excel/Writer, or the html report in the browser if no xlsx is written",
 )
 parser.add_argument("-s", "--standbylimit", action="store_true", help="limit monthly standby limit")
 parser.add_argument(
     "-m", "--managerfromconfig", action="store_true", help="override manager with manager found in userdata.csv"
 )
 parser.add_argument(
-    "filename",
+    "-c",
+    "--constantmemory",
+    action="store_true",
+    help="stream rows to disk while generating (xlsxwriter constant_memory mode) to keep memory use low",
+)
+parser.add_argument(
+    "-n", "--numpy", action="store_true", help="compute day-grid sheets with NumPy (requires numpy to be installed)"
+)
+parser.add_argument(
+    "-j", "--jobs", type=int, default=1, help="number of worker processes generating sheets in parallel (default: 1)"
+)
+parser.add_argument(
+    "--parsejobs",
+    type=int,
+    default=1,
+    help="number of worker processes parsing a single timesheet in chunks (default: 1); the parsed timesheet cache is "
+    "not used then",
+)
+parser.add_argument(
+    "--sheets",
+    help="comma separated list of sheets to generate, by sheet name (e.g. 'Payroll (summary)') or generator name "
+    "(e.g. SGByUser); default: the list in cfg/sheets.txt, or all sheets",
+)
+parser.add_argument(
+    "--nocache",
+    action="store_true",
+    help="do not use or write the parsed timesheet cache ('<timesheet>.psgcache' next to the timesheet)",
+)
+parser.add_argument(
+    "-f",
+    "--format",
+    action="append",
+    choices=["xlsx", "csv", "jsonl", "html"],
+    help="output format, may be given several times (default: xlsx); csv and jsonl write each sheet into its own "
+    "'sum_<sheet>.<format>' file, without any formatting; html writes all sheets into a single 'sum.html' with the "
+    "colours of the xlsx",
+)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="print wall time, CPU time, rows and peak allocation of each phase and sheet, also written onto the Info "
+    "sheet (memory tracing slows the run down)",
+)
+parser.add_argument("--profilestats", metavar="FILE", help="write cProfile statistics into FILE (implies --profile)")
+parser.add_argument(
+    "--profilejson", metavar="FILE", help="write the phase timings into FILE as JSON (implies --profile)"
+)
+parser.add_argument(
+    "--backend",
+    choices=["memory", "sqlite"],
+    default="memory",
+    help="where the timesheet rows are aggregated: in memory (default), or in a temporary SQLite database for "
+    "timesheets too large to aggregate in memory",
+)
+parser.add_argument(
+    "--warehouse",
     nargs="?",
-    help="timesheet in CSV format to process; if omitted, latest 'TimesheetReport_*.txt' file is picked from user's default Download folder",
+    const=os.path.join("cfg", "warehouse.sqlite"),
+    metavar="FILE",
+    help="import the timesheets into a persistent store (default: cfg/warehouse.sqlite), each replacing the rows of "
+    "the period it covers, and generate the outputs from all the rows stored",
+)
+parser.add_argument("--from", dest="first", type=day, help="first day of the outputs (YYYY-MM-DD, with --warehouse)")
+parser.add_argument("--to", dest="last", type=day, help="last day of the outputs (YYYY-MM-DD, with --warehouse)")
+parser.add_argument(
+    "--delta",
+    metavar="PREVIOUS",
+    help="write only the rows changed since PREVIOUS, an earlier timesheet or a snapshot written by --snapshot, into "
+    "'delta.xlsx' (Payroll (summary) and Project daily rows with any day changed, added or removed; rows removed "
+    "entirely are written with zero totals and empty days); of the selected sheets, only these and Info are written",
+)
+parser.add_argument(
+    "--snapshot",
+    metavar="FILE",
+    help="write fingerprints of the aggregated days into FILE, to be compared with a later run by --delta",
+)
+parser.add_argument(
+    "-w",
+    "--watch",
+    action="store_true",
+    help="keep running and regenerate the outputs whenever the timesheets (or the latest one in the Download folder) "
+    "are new or changed, until stopped with Ctrl+C",
 )
-args = parser.parse_args()
+parser.add_argument(
+    "--interval", type=float, default=2, help="seconds between checks for new or changed timesheets (default: 2)"
+)
+parser.add_argument(
+    "filename",
+    nargs="*",
+    help="timesheets in CSV format to process, or glob patterns of them (rows repeated by overlapping timesheets are "
+    "counted once); if omitted, latest 'TimesheetReport_*.txt' file is picked from user's default Download folder",
+)
+
 
-inputfilename = None
-if args.filename is not None:
-    if os.path.isfile(args.filename):
-        inputfilename = args.filename
+def find_inputs(patterns):
+    """Returns (inputfilenames, error) of the timesheets given by patterns (file names or glob patterns), or of the
+    latest 'TimesheetReport_*.txt' file in the user's Download folder if there are no patterns. error is None if all
+    of them were found."""
+    inputfilenames = []
+    if len(patterns) > 0:
+        for fn in patterns:
+            if glob.has_magic(fn):
+                matching_files = glob.glob(fn)
+                if len(matching_files) == 0:
+                    return inputfilenames, f"Could not find any timesheet matching: {fn}"
+                inputfilenames += sorted(matching_files, key=os.path.getctime)
+            elif os.path.isfile(fn):
+                inputfilenames.append(fn)
+            else:
+                return inputfilenames, f"Input file does not exist: {fn}"
     else:
-        print(f"Input file does not exist: {args.filename}")
-        sys.exit(1)
-else:
-    downloads_folder = userpaths.get_downloads()
-    matching_files = glob.glob(os.path.join(userpaths.get_downloads(), "TimesheetReport_*.txt"))
-    if len(matching_files) == 0:
-        print(f"Could not find any timesheet in folder: {format(downloads_folder)}")
-        sys.exit(1)
-    inputfilename = max(matching_files, key=os.path.getctime)
-print(f"Parsing: {inputfilename}")
+        import userpaths
 
+        downloads_folder = userpaths.get_downloads()
+        matching_files = glob.glob(os.path.join(userpaths.get_downloads(), "TimesheetReport_*.txt"))
+        if len(matching_files) == 0:
+            return inputfilenames, f"Could not find any timesheet in folder: {format(downloads_folder)}"
+        inputfilenames.append(max(matching_files, key=os.path.getctime))
+    return inputfilenames, None
 
-workbook = xlsxwriter.Workbook("sum.xlsx")
 
-cellFormats = {
-    "headerday": workbook.add_format({"align": "center", "bold": "true"}),
-    "headerworkday": workbook.add_format({"align": "center", "bold": "true", "font_color": "black"}),
-    "headernonworkday": workbook.add_format({"align": "center", "bold": "true", "font_color": "red"}),
-    "headertxt": workbook.add_format({"align": "left", "bold": "true"}),
-    "headernum": workbook.add_format({"align": "right", "bold": "true"}),
-    "datatxt": workbook.add_format({"align": "left"}),
-    "datanum": workbook.add_format({"align": "right", "indent": 1}),
-    "datausd": workbook.add_format({"align": "right", "indent": 1, "num_format": "#,##0.00"}),
-    "hourFormats": {
-        HourFormat.WORK: workbook.add_format({"align": "center", "bg_color": "#90ee90"}),
-        HourFormat.UNDER: workbook.add_format({"align": "center", "bg_color": "#9acd32"}),
-        HourFormat.OVER: workbook.add_format({"align": "center", "bg_color": "#ffa500"}),
-        HourFormat.VACATION: workbook.add_format({"align": "center", "bg_color": "#ffff00"}),
-        HourFormat.SICK: workbook.add_format({"align": "center", "bg_color": "#da70d6"}),
-        HourFormat.MISS: workbook.add_format({"align": "center", "bg_color": "#d3d3d3"}),
-        HourFormat.QUESTION: workbook.add_format({"align": "center", "bg_color": "#808080"}),
-        HourFormat.EMPTY: workbook.add_format({"align": "center", "bg_color": "#ffffff"}),
-        HourFormat.STANDBY: workbook.add_format({"align": "center", "bg_color": "#9090ee"}),
-    },
-}
+def import_inputs(warehouse, inputfilenames, read):
+    """Imports the timesheets into warehouse, oldest first, so the newest export wins for the period it covers.
+    Returns False if a timesheet could not be parsed."""
+    for inputfilename in sorted(inputfilenames, key=os.path.getmtime):
+        try:
+            nrows = warehouse.import_file(inputfilename, read(inputfilename))
+        except Exception as exc:
+            print(f"Could not parse input: {inputfilename}")
+            print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+            traceback.print_exc()
+            return False
+        if nrows is None:
+            print(f"Already imported: {inputfilename}")
+        else:
+            print(f"Imported: {inputfilename} ({nrows} rows)")
+    return True
+
+
+def create_data(config, views, backend):
+    if backend == "sqlite":
+        from SQLiteAggregator import SQLiteAggregator
+
+        return SQLiteAggregator(config, views)
+    return Aggregator(config, views)
 
-sheetGenerators = [
-    SGByUser(config, cellFormats, args.standbylimit, args.managerfromconfig),
-    SGStandbyChanges(config, cellFormats, args.standbylimit, args.managerfromconfig),
-    SGProjectDaily(config, cellFormats, args.managerfromconfig),
-    SGProjectMonthly(config, cellFormats, args.managerfromconfig),
-    SGWorkMonthly(config, cellFormats, args.managerfromconfig),
-    SGStandby(config, cellFormats, args.managerfromconfig),
-    SGInfo(config, cellFormats, False),
-]
-
-try:
-    with open(inputfilename, newline="", encoding="utf-8") as inputfile:
-        reader = csv.DictReader(inputfile, delimiter="\t")
-        for row in reader:
-            # Assumption: if first field can be parsed as date, then it is a data row
-            date = None
+
+def load_data(config, views, classifier, sources, profiler, backend="memory"):
+    """Aggregates the records of sources, a list of (inputfilename, records), dropping rows repeated across them.
+    Returns None if a timesheet could not be parsed, the returned data must be closed once the outputs are
+    generated."""
+    data = create_data(config, views, backend)
+    merger = RowMerger()
+    with profiler.phase("parse") as parsePhase:
+        loadRow = data.loadRow
+        if profiler.enabled:
+            loadRow, loadPhase = profiler.timed("loadRow", data.loadRow)
+
+        nrows = 0
+        for inputfilename, records in sources:
             try:
-                date = dt.strptime(row["Date"], "%Y%m%d")
-            except ValueError:
-                continue
+                if len(sources) > 1:
+                    records = merger.merge(records)
+
+                for record in records:
+                    nrows += 1
+                    if classifier.include(record):
+                        loadRow(record)
+
+            except Exception as exc:
+                print(f"Could not parse input: {inputfilename}")
+                print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+                traceback.print_exc()
+                data.close()
+                return None
+
+        data.flush()
+
+    if profiler.enabled:
+        parsePhase["rows"] = nrows
+        Profiler.exclude(parsePhase, loadPhase)
+
+    with profiler.phase("index calendars"):
+        config.index_calendars(data.min_date, data.max_date)
+
+    return data
+
+
+def needed_views(selectedSheets, args):
+    views = set().union(*[g.VIEWS for g in selectedSheets])
+    # the fingerprints of a delta or snapshot are taken from sumprojectactivity, whichever sheets are written
+    if args.delta is not None or args.snapshot is not None:
+        views.add("sumprojectactivity")
+    return views
+
+
+def load_previous(config, args, classifier, read, profiler):
+    """Returns the fingerprints of args.delta, a snapshot or a timesheet, None if it could not be read."""
+    from Delta import Delta
+
+    try:
+        if Delta.is_snapshot(args.delta):
+            return Delta.load(args.delta)
+    except (OSError, ValueError) as exc:
+        print(f"Could not read snapshot: {args.delta}")
+        print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+        return None
+    data = load_data(
+        config, {"sumprojectactivity"}, classifier, [(args.delta, read(args.delta))], profiler, args.backend
+    )
+    if data is None:
+        return None
+    try:
+        return Delta.fingerprints(data)
+    finally:
+        data.close()
+
+
+def load_data_parallel(config, views, inputfilename, jobs, profiler, backend="memory"):
+    """As load_data, for a single timesheet parsed in chunks by jobs worker processes. Returns None if it could not be
+    parsed."""
+    from ParallelParser import parseParallel
+
+    data = create_data(config, views, backend)
+    print(f"Parsing: {inputfilename}")
+    with profiler.phase(f"parse (parallel, {jobs} jobs)") as parsePhase:
+        try:
+            parsePhase["rows"] = parseParallel(data, inputfilename, jobs)
+        except Exception as exc:
+            print(f"Could not parse input: {inputfilename}")
+            print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+            traceback.print_exc()
+            data.close()
+            return None
+        data.flush()
+
+    with profiler.phase("index calendars"):
+        config.index_calendars(data.min_date, data.max_date)
+
+    return data
+
+
+def generate_outputs(config, args, data, selectedSheets, profiler, previous=None):
+    """Generates the selected sheets in the output formats of args. If previous, the fingerprints of an earlier run,
+    is given, only the rows changed since then are written, into the 'delta' outputs. Returns the name of the file
+    to open with --autoopen: the xlsx workbook, else the html report, None if neither is written."""
+    basename = "sum"
+    delta = None
+    fingerprints = None
+    if previous is not None or args.snapshot is not None:
+        from Delta import Delta
+
+        with profiler.phase("fingerprints"):
+            fingerprints = Delta.fingerprints(data)
+        if previous is not None:
+            delta = Delta.compare(previous, fingerprints)
+            basename = "delta"
+            print(f"Changed: {len(delta.changed)} days in {len(delta.rows)} rows of {len(delta.emails)} users")
+
+    formats = list(dict.fromkeys(args.format or ["xlsx"]))
+    workbooks = []
+    workbook = None
+    if "xlsx" in formats:
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(f"{basename}.xlsx", {"constant_memory": args.constantmemory})
+        workbooks.append(workbook)
+        cellFormats = makeFormats(CELL_FORMATS, workbook.add_format)
+    else:
+        # plain outputs ignore formats and the html output only tells them apart, so xlsxwriter is not involved at all
+        cellFormats = makeFormats(CELL_FORMATS, lambda properties: object())
+    if "html" in formats:
+        from HtmlOutput import HtmlWorkbook
+
+        workbooks.append(HtmlWorkbook(basename, CELL_FORMATS, cellFormats))
+    workbooks += [PlainWorkbook(basename, format) for format in formats if format not in ("xlsx", "html")]
+    output = workbooks[0] if len(workbooks) == 1 else TeeWorkbook(workbooks)
+
+    # parallel generators only see placeholders, real formats are applied when the sheets are written
+    generatorFormats = cellFormats
+    if args.jobs > 1:
+        from SheetRecorder import formatRefs, generateSheetsParallel
+
+        generatorFormats = formatRefs(cellFormats)
+    sheetGenerators = create_generators(selectedSheets, config, generatorFormats, data, args, profiler, delta)
+
+    # sumbyuser is shared, so standby is limited once for all limiter sheets, before any of them is generated
+    limiters = [g for g in sheetGenerators if isinstance(g, SGStandbyLimiter)]
+    if args.standbylimit and len(limiters) > 0:
+        with profiler.phase("limitStandby"):
+            limiters[0].limitStandby()
+
+    if args.jobs > 1:
+        with profiler.phase(f"generateSheet (parallel, {args.jobs} jobs)"):
+            generateSheetsParallel(sheetGenerators, output, cellFormats, args.jobs)
+    else:
+        for g in sheetGenerators:
+            with profiler.phase(f"generateSheet {type(g).__name__}"):
+                g.generateSheet(output)
+
+    for w in workbooks:
+        with profiler.phase("workbook.close()" if w is workbook else f"close {w.format}"):
+            w.close()
+        for filename in w.filenames if isinstance(w, PlainWorkbook) else [w.filename]:
+            print(f"Saved: {os.path.join(os.getcwd(), str(filename))}")
 
-            email = row["Email Address"].lower()
+    if args.snapshot is not None:
+        Delta.save(args.snapshot, fingerprints)
+        print(f"Saved: {os.path.join(os.getcwd(), args.snapshot)}")
 
-            if not filter_email(email):
-                continue
+    if workbook is not None:
+        return workbook.filename
+    return f"{basename}.html" if "html" in formats else None
 
-            if not filter_project(row["Project"], row["Project Description"]):
-                continue
 
-            for g in sheetGenerators:
-                g.loadRow(row)
+def report_profile(profiler, args, inputfilenames):
+    if profiler.enabled:
+        profiler.print_summary()
+        if args.profilejson:
+            # the --from/--to window is given as YYYY-MM-DD, like on the command line
+            options = {k: v.strftime("%Y-%m-%d") if isinstance(v, dt) else v for k, v in vars(args).items()}
+            profiler.dump_json(args.profilejson, inputfiles=inputfilenames, args=options)
+            print(f"Saved: {os.path.join(os.getcwd(), args.profilejson)}")
 
-except Exception as exc:
-    print(f"Could not parse input: {inputfilename}")
-    print(f"Exception: {type(exc)}, Arguments: {exc.args}")
-    traceback.print_exc()
-    sys.exit(1)
 
-for g in sheetGenerators:
-    g.generateSheet(workbook)
+def open_workbook(filename):
+    import subprocess
 
-workbook.close()
-print(f"Saved: {os.path.join(os.getcwd(), str(workbook.filename))}")
+    if filename.endswith(".html"):
+        import webbrowser
+        from pathlib import Path
 
-if args.autoopen:
-    if sys.platform == "win32":
-        os.system("start excel sum.xlsx")
-        # subprocess.Popen(["start", "excel", "sum.xlsx"])
+        webbrowser.open(Path(filename).resolve().as_uri())
+    elif sys.platform == "win32":
+        os.system(f"start excel {filename}")
+        # subprocess.Popen(["start", "excel", filename])
     elif sys.platform == "linux":
-        subprocess.Popen(["libreoffice", "--calc", "sum.xlsx"])
+        subprocess.Popen(["libreoffice", "--calc", filename])
+
+
+def watch(config, args, selectedSheets, classifier, read, profiling, warehouse=None, previous=None):
+    """Regenerates the outputs whenever the timesheets are new or changed, until interrupted with Ctrl+C.
+
+    A timesheet is only parsed once its size and modification time did not change between two checks, so files still
+    being downloaded are not picked up. Only the signatures of the timesheets are kept, their rows are read again for
+    each run through the RowCache, so only new or changed timesheets are parsed (all of them with --nocache), and
+    config, filters and parse caches stay loaded between runs.
+    """
+    views = needed_views(selectedSheets, args)
+    parsed = {}  # inputfilename -> (signature, whether it could be parsed)
+    pending = {}  # inputfilename -> signature at the previous check
+    generated = None
+
+    print(f"Watching for new or changed timesheets every {args.interval} seconds, press Ctrl+C to stop")
+    try:
+        while True:
+            inputfilenames, _ = find_inputs(args.filename)
+            signatures = {}
+            for fn in inputfilenames:
+                try:
+                    st = os.stat(fn)
+                except OSError:
+                    continue
+                signatures[fn] = (st.st_size, st.st_mtime_ns)
+                if fn in parsed and parsed[fn][0] == signatures[fn]:
+                    continue
+                if pending.get(fn) != signatures[fn]:
+                    pending[fn] = signatures[fn]
+                    continue
+
+                print(f"Parsing: {fn}")
+                try:
+                    # reading all rows stores the cache the runs read them from
+                    for _ in read(fn):
+                        pass
+                    parsed[fn] = (signatures[fn], True)
+                except Exception as exc:
+                    # parsed again once the file changes
+                    print(f"Could not parse input: {fn}")
+                    print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+                    parsed[fn] = (signatures[fn], False)
+
+            for fn in list(parsed):
+                if fn not in signatures:
+                    del parsed[fn]
+                    pending.pop(fn, None)
+
+            current = [(fn, signatures.get(fn)) for fn in inputfilenames]
+            ready = all(fn in parsed and parsed[fn][0] == sig and parsed[fn][1] for fn, sig in current)
+            if len(current) > 0 and ready and current != generated:
+                generated = current
+                profiler = Profiler(profiling)
+                sources = [(fn, read(fn)) for fn in inputfilenames]
+                if warehouse is not None:
+                    import_inputs(warehouse, inputfilenames, read)
+                    sources = [(warehouse.path, warehouse.read(args.first, args.last))]
+                data = load_data(config, views, classifier, sources, profiler, args.backend)
+                try:
+                    if data is not None:
+                        opened = generate_outputs(config, args, data, selectedSheets, profiler, previous)
+                        report_profile(profiler, args, inputfilenames)
+                        if args.autoopen and opened is not None:
+                            open_workbook(opened)
+                except Exception as exc:
+                    print("Could not generate outputs")
+                    print(f"Exception: {type(exc)}, Arguments: {exc.args}")
+                finally:
+                    if data is not None:
+                        data.close()
+
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+
+def main():
+    args = parser.parse_args()
+
+    profiling = args.profile or args.profilestats is not None or args.profilejson is not None
+    stats = None
+    if args.profilestats:
+        import cProfile
+
+        stats = cProfile.Profile()
+        stats.enable()
+
+    if args.numpy and not DayGrid.available():
+        print("NumPy is not installed, computing day-grid sheets without it")
+        args.numpy = False
+
+    if (args.first is not None or args.last is not None) and args.warehouse is None:
+        parser.error("--from and --to require --warehouse")
+
+    inputfilenames = []
+    if not args.watch:
+        inputfilenames, error = find_inputs(args.filename)
+        # a warehouse is reported on even without a new timesheet in the Download folder
+        if error is not None and (args.warehouse is None or len(args.filename) > 0):
+            print(error)
+            sys.exit(1)
+
+    config = Config()
+    selectedSheets = select_sheets(args.sheets.split(",") if args.sheets else config.Sheets)
+    if args.delta is not None:
+        unsupported = [g.SHEET_NAME for g in selectedSheets if g not in DELTA_SHEETS]
+        if args.sheets and unsupported:
+            parser.error(f"--delta does not support the sheets: {', '.join(unsupported)}")
+        selectedSheets = [g for g in selectedSheets if g in DELTA_SHEETS]
+        if len(selectedSheets) == 0:
+            parser.error(f"--delta needs one of the sheets: {', '.join(g.SHEET_NAME for g in DELTA_SHEETS)}")
+    classifier = RowClassifier(config)
+    reader = TimesheetReader(RowNormalizer(config, classifier))
+    cache = RowCache(reader)
+
+    def read(inputfilename):
+        return reader.read_file(inputfilename) if args.nocache else cache.read(inputfilename)
+
+    warehouse = None
+    if args.warehouse is not None:
+        from Warehouse import Warehouse
+
+        warehouse = Warehouse(args.warehouse, reader)
+
+    def readInput(inputfilename):
+        print(f"Parsing: {inputfilename}")
+        yield from read(inputfilename)
+
+    profiler = Profiler(profiling)
+    previous = None
+    if args.delta is not None:
+        # read before the timesheets, so the calendars are indexed for the dates of the timesheets
+        previous = load_previous(config, args, classifier, readInput, profiler)
+        if previous is None:
+            sys.exit(1)
+
+    if args.watch:
+        watch(config, args, selectedSheets, classifier, read, profiling, warehouse, previous)
+    else:
+        views = needed_views(selectedSheets, args)
+        sources = [(fn, readInput(fn)) for fn in inputfilenames]
+        if warehouse is not None:
+            if not import_inputs(warehouse, inputfilenames, readInput):
+                sys.exit(1)
+            sources = [(warehouse.path, warehouse.read(args.first, args.last))]
+        if args.parsejobs > 1 and warehouse is None and len(inputfilenames) == 1:
+            data = load_data_parallel(config, views, inputfilenames[0], args.parsejobs, profiler, args.backend)
+        else:
+            data = load_data(config, views, classifier, sources, profiler, args.backend)
+        if data is None:
+            sys.exit(1)
+
+        try:
+            opened = generate_outputs(config, args, data, selectedSheets, profiler, previous)
+        finally:
+            data.close()
+        report_profile(profiler, args, inputfilenames)
+        if args.autoopen and opened is not None:
+            open_workbook(opened)
+
+    if warehouse is not None:
+        warehouse.close()
+
+    if stats is not None:
+        stats.disable()
+        stats.dump_stats(args.profilestats)
+        print(f"Saved: {os.path.join(os.getcwd(), args.profilestats)}")
+
 
-# print(sys.path)
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,19 @@ for fn in [
     "SGStandbyLimiter.py",
     "SGInfo.py",
     "SheetGenerator.py",
+    "Aggregator.py",
+    "timesheet.py",
+    "workcalendar.py",
+    "DayGrid.py",
+    "SheetRecorder.py",
+    "RowCache.py",
+    "PlainOutput.py",
+    "Profiler.py",
+    "SQLiteAggregator.py",
+    "Warehouse.py",
+    "Delta.py",
+    "ParallelParser.py",
+    "HtmlOutput.py",
     "patchfiles.txt",
 ]:
     shutil.copy(os.path.join("..", fn), reldir)
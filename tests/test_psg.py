@@ -0,0 +1,190 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+PSG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "psg.py")
+
+HEADER = [
+    "Date",
+    "Email Address",
+    "User",
+    "Level 1 Approver Name (configured)",
+    "Project",
+    "Project Description",
+    "Activity",
+    "Hours",
+]
+
+
+def write_export(fn, rows, approver="Manager"):
+    # rows are (YYYYMMDD, email, project, activity, hours)
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write("\t".join(HEADER) + "\n")
+        for date, email, project, activity, hours in rows:
+            user = email.split("@")[0]
+            f.write("\t".join([date, email, user, approver, project, project, activity, str(hours)]) + "\n")
+
+
+def read_jsonl(fn):
+    with open(fn, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def psg(cwd, *args):
+    result = subprocess.run([sys.executable, PSG, "--nocache", *args], cwd=cwd, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    # psg reads its configuration from cfg/ in the working directory, missing files are empty
+    (tmp_path / "cfg").mkdir()
+    return tmp_path
+
+
+def test_profilejson_with_date_window(workdir):
+    write_export(
+        workdir / "t.txt",
+        [
+            ("20250106", "a@capgemini.com", "P1", "Dev", 8),
+            ("20250107", "a@capgemini.com", "P1", "Dev", 8),
+        ],
+    )
+    psg(workdir, "-f", "jsonl", "--warehouse", "w.sqlite", "--from", "2025-01-07", "--profilejson", "p.json", "t.txt")
+
+    with open(workdir / "p.json", encoding="utf-8") as f:
+        profile = json.load(f)
+    assert profile["args"]["first"] == "2025-01-07"
+    assert profile["args"]["last"] is None
+    assert len(profile["phases"]) > 0
+
+
+def test_overlapping_exports(workdir):
+    # two identical bookings on the 6th within the first export, both are kept
+    write_export(
+        workdir / "first.txt",
+        [
+            ("20250106", "a@capgemini.com", "P1", "Dev", 4),
+            ("20250106", "a@capgemini.com", "P1", "Dev", 4),
+            ("20250107", "a@capgemini.com", "P1", "Dev", 8),
+        ],
+    )
+    # the second export repeats the first after a manager change and has a third copy of the booking on the 6th
+    write_export(
+        workdir / "second.txt",
+        [
+            ("20250106", "a@capgemini.com", "P1", "Dev", 4),
+            ("20250106", "a@capgemini.com", "P1", "Dev", 4),
+            ("20250106", "a@capgemini.com", "P1", "Dev", 4),
+            ("20250107", "a@capgemini.com", "P1", "Dev", 8),
+            ("20250108", "a@capgemini.com", "P1", "Dev", 8),
+        ],
+        approver="New Manager",
+    )
+    psg(workdir, "-f", "jsonl", "--sheets", "Payroll (summary)", "first.txt", "second.txt")
+
+    [summary] = read_jsonl(workdir / "sum_payroll_summary.jsonl")[2:]
+    assert summary[3] == 4 + 4 + 4 + 8 + 8
+    assert summary[9:12] == [12, 8, 8]
+
+
+def test_delta_lists_removed_rows(workdir):
+    before = [
+        ("20250106", "a@capgemini.com", "P1", "Dev", 8),
+        ("20250106", "b@capgemini.com", "P1", "Dev", 4),
+        ("20250106", "b@capgemini.com", "P2", "Test", 4),
+        ("20250107", "c@capgemini.com", "P1", "Dev", 8),
+    ]
+    # b's P2 row and all of c's rows disappear
+    after = [
+        ("20250106", "a@capgemini.com", "P1", "Dev", 8),
+        ("20250106", "b@capgemini.com", "P1", "Dev", 8),
+    ]
+    write_export(workdir / "before.txt", before)
+    write_export(workdir / "after.txt", after)
+    psg(workdir, "-f", "jsonl", "--delta", "before.txt", "after.txt")
+
+    daily = {tuple(r[:1] + r[6:8]): r for r in read_jsonl(workdir / "delta_project_daily.jsonl")[2:]}
+    assert set(daily) == {
+        ("b@capgemini.com", "P1", "Dev"),
+        ("b@capgemini.com", "P2", "Test"),
+        ("c@capgemini.com", "P1", "Dev"),
+    }
+    assert daily["b@capgemini.com", "P2", "Test"][8:11] == [0, 0, 0]
+    assert daily["c@capgemini.com", "P1", "Dev"][8:11] == [0, 0, 0]
+
+    summary = {r[0]: r for r in read_jsonl(workdir / "delta_payroll_summary.jsonl")[2:]}
+    assert set(summary) == {"b@capgemini.com", "c@capgemini.com"}
+    assert summary["c@capgemini.com"][3:9] == [0] * 6
+
+
+@pytest.mark.parametrize("previous", ["before.txt", "before.psgdelta"])
+def test_delta_of_identical_exports_with_sheets(workdir, previous):
+    rows = [
+        ("20250106", "a@capgemini.com", "P1", "Dev", 8),
+        ("20250107", "b@capgemini.com", "P2", "Test", 8),
+    ]
+    write_export(workdir / "before.txt", rows)
+    write_export(workdir / "after.txt", rows)
+    psg(workdir, "-f", "jsonl", "--sheets", "Info", "--snapshot", "before.psgdelta", "before.txt")
+    out = psg(workdir, "-f", "jsonl", "--delta", previous, "--sheets", "Payroll (summary)", "after.txt")
+
+    assert "Changed: 0 days in 0 rows of 0 users" in out
+    assert read_jsonl(workdir / "delta_payroll_summary.jsonl")[2:] == []
+
+
+def test_delta_rejects_unsupported_sheets(workdir):
+    write_export(workdir / "t.txt", [("20250106", "a@capgemini.com", "P1", "Dev", 8)])
+    result = subprocess.run(
+        [sys.executable, PSG, "--nocache", "--delta", "t.txt", "--sheets", "Project monthly", "t.txt"],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "Project monthly" in result.stderr
+
+
+def read_outputs(workdir):
+    # sum_info.jsonl has the time of the run
+    return {fn.name: fn.read_text(encoding="utf-8") for fn in workdir.glob("*.jsonl") if fn.name != "sum_info.jsonl"}
+
+
+def test_parallel_sqlite_and_cached_runs_match(workdir):
+    rows = []
+    for day in range(6, 18):
+        date = f"202501{day:02d}"
+        rows += [
+            (date, "a@capgemini.com", "P1", "Dev", 6),
+            (date, "a@capgemini.com", "P2", "Test", 2),
+            (date, "b@capgemini.com", "Vacations", "Vacations", 8)
+            if day % 5 == 0
+            else (date, "b@capgemini.com", "P1", "Dev", 8),
+            (date, "c@capgemini.com", "P3", "Standby Hours - Hungary", 4),
+        ]
+    rows.append(("20250203", "a@capgemini.com", "P1", "Review", 8))
+    write_export(workdir / "t.txt", rows)
+
+    psg(workdir, "-f", "jsonl", "t.txt")
+    expected = read_outputs(workdir)
+    assert "sum_payroll_summary.jsonl" in expected
+
+    psg(workdir, "-f", "jsonl", "--parsejobs", "2", "t.txt")
+    assert read_outputs(workdir) == expected
+    psg(workdir, "-f", "jsonl", "--backend", "sqlite", "t.txt")
+    assert read_outputs(workdir) == expected
+    psg(workdir, "-f", "jsonl", "--backend", "sqlite", "--parsejobs", "2", "t.txt")
+    assert read_outputs(workdir) == expected
+
+    # the first run writes the cache, the second one reads it
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, PSG, "-f", "jsonl", "t.txt"], cwd=workdir, capture_output=True, text=True
+        )
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert (workdir / "t.txt.psgcache").exists()
+        assert read_outputs(workdir) == expected
@@ -0,0 +1,244 @@
+import csv
+import hashlib
+import io
+import os
+import re
+from datetime import datetime as dt
+from operator import itemgetter
+from typing import NamedTuple
+from common import HourType, parse_hours
+from config import Config
+
+
+# columns of the timesheet export used by psg, in the order RowNormalizer.normalize expects them
+COLUMNS = [
+    "Date",
+    "Email Address",
+    "User",
+    "Level 1 Approver Name (configured)",
+    "Project",
+    "Project Description",
+    "Activity",
+    "Hours",
+]
+
+
+class TimesheetRow(NamedTuple):
+    date: dt
+    email: str
+    user: str
+    approver: str
+    project: str
+    description: str
+    label: str
+    activity: str
+    hourtype: HourType
+    hours: int
+
+
+class RowClassifier:
+    """Decides which rows are processed (cfg/users.txt and cfg/projects.txt filters) and the label and HourType of
+    a (project, description, activity).
+
+    An export only has a few hundred distinct emails and (project, description, activity) combinations, so every
+    decision is made once per distinct value and memoized. The project filter patterns are compiled into one regular
+    expression, so a project is matched against all of them in a single scan.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.users = set(config.Users)
+        self.projects = None
+        if len(config.Projects) > 0:
+            self.projects = re.compile(
+                "|".join(re.escape(p) for p in sorted(set(config.Projects), key=len, reverse=True))
+            )
+        self._emails = {}
+        self._projects = {}
+        self._classes = {}
+
+    def include_email(self, email):
+        if email not in self._emails:
+            self._emails[email] = (
+                len(self.users) == 0 or email in self.users or email.replace("@capgemini.com", "") in self.users
+            )
+        return self._emails[email]
+
+    def include_project(self, project, description):
+        key = (project, description)
+        if key not in self._projects:
+            self._projects[key] = (
+                self.projects is None
+                or self.projects.search(project.lower()) is not None
+                or self.projects.search(description.lower()) is not None
+            )
+        return self._projects[key]
+
+    def include(self, record):
+        return self.include_email(record.email) and self.include_project(record.project, record.description)
+
+    def classify(self, project, description, activity):
+        # returns (label, HourType)
+        key = (project, description, activity)
+        if key not in self._classes:
+            self._classes[key] = (
+                f"{project} {description}" if project != description else project,
+                self.config.get_hour_type(project, activity),
+            )
+        return self._classes[key]
+
+
+class RowNormalizer:
+    """Turns raw timesheet rows into TimesheetRow records.
+
+    Dates and hours are parsed once per distinct source string, labels and hour types come from the RowClassifier.
+    """
+
+    def __init__(self, config: Config, classifier: RowClassifier = None):
+        self.config = config
+        self.classifier = classifier if classifier is not None else RowClassifier(config)
+        self._dates = {}
+        self._hours = {}
+
+    def parse_date(self, s):
+        # returns None if s is not a date, i.e. the row is not a data row
+        if s in self._dates:
+            return self._dates[s]
+        date = None
+        if len(s) == 8 and s.isdigit():
+            try:
+                date = dt.strptime(s, "%Y%m%d")
+            except ValueError:
+                pass
+        self._dates[s] = date
+        return date
+
+    def parse_hours(self, s):
+        if s not in self._hours:
+            self._hours[s] = parse_hours(s)
+        return self._hours[s]
+
+    def normalize(self, fields):
+        # fields are ordered as in COLUMNS
+        date = self.parse_date(fields[0])
+        if date is None:
+            return None
+
+        _, email, user, approver, proj, desc, activity, hours = fields
+        return self.record(date, email.lower(), user, approver, proj, desc, activity, self.parse_hours(hours))
+
+    def record(self, date, email, user, approver, proj, desc, activity, hours):
+        # builds the record from already parsed fields
+        label, hourtype = self.classifier.classify(proj, desc, activity)
+        return TimesheetRow(date, email, user, approver, proj, desc, label, activity, hourtype, hours)
+
+
+class TimesheetReader:
+    """Reads a tab separated timesheet export and yields a TimesheetRow for each data row.
+
+    The header line is resolved to column positions once, data rows are plain csv.reader lists. Header, footer and
+    blank lines are skipped: they are either too short or their Date field is not a YYYYMMDD date.
+    """
+
+    def __init__(self, normalizer: RowNormalizer):
+        self.normalizer = normalizer
+
+    def read_file(self, inputfilename):
+        with open(inputfilename, newline="", encoding="utf-8") as f:
+            yield from self.read(f)
+
+    def read(self, f):
+        reader = csv.reader(f, delimiter="\t")
+        header = next(reader, None)
+        if header is None:
+            return
+        yield from self.records(header, reader)
+
+    def read_range(self, inputfilename, start, end):
+        """Yields the TimesheetRows of the lines from byte offset start to end of inputfilename, both at the start of
+        a line (see split_lines), so parts of an export can be parsed on their own."""
+        with open(inputfilename, "rb") as f:
+            header = next(csv.reader([f.readline().decode("utf-8")], delimiter="\t"), None)
+            f.seek(start)
+            lines = f.read(end - start).decode("utf-8")
+        if header is None:
+            return
+        yield from self.records(header, csv.reader(io.StringIO(lines, newline=""), delimiter="\t"))
+
+    @staticmethod
+    def split_lines(inputfilename, parts):
+        """Returns the (start, end) byte offsets of up to parts ranges of about the same size covering the lines after
+        the header line. Rows with line breaks inside quoted fields are not supported, exports have none."""
+        with open(inputfilename, "rb") as f:
+            f.readline()
+            first = f.tell()
+            size = os.fstat(f.fileno()).st_size
+            offsets = [first]
+            for i in range(1, parts):
+                # the range ends at the first line starting at or after its share of the bytes
+                f.seek(max(first + (size - first) * i // parts - 1, offsets[-1]))
+                f.readline()
+                if f.tell() > offsets[-1] and f.tell() < size:
+                    offsets.append(f.tell())
+            offsets.append(size)
+        return list(zip(offsets, offsets[1:]))
+
+    def records(self, header, reader):
+        if header:
+            header[0] = header[0].lstrip("\ufeff")
+
+        missing = [c for c in COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        indices = [header.index(c) for c in COLUMNS]
+        width = max(indices) + 1
+        getfields = itemgetter(*indices)
+        normalize = self.normalizer.normalize
+
+        for fields in reader:
+            if len(fields) < width:
+                continue
+            record = normalize(getfields(fields))
+            if record is not None:
+                yield record
+
+
+class RowMerger:
+    """Drops rows that an earlier export already delivered, as happens with overlapping exports. merge() is called
+    with the records of each export in turn.
+
+    Rows are compared by a 16 byte digest of their booking (date, email, project, description, activity, hours), so
+    a row is still recognized when the user's name or approver changed between the exports, and the rows themselves
+    are not kept. Identical bookings within a single export are all kept: a row is only dropped while an earlier
+    export had at least as many copies of it.
+    """
+
+    def __init__(self):
+        self.seen = {}
+
+    @staticmethod
+    def fingerprint(record):
+        # fields of an export never contain tabs
+        booking = "\t".join(
+            [
+                str(record.date.toordinal()),
+                record.email,
+                record.project,
+                record.description,
+                record.activity,
+                str(record.hours),
+            ]
+        )
+        return hashlib.blake2b(booking.encode(), digest_size=16).digest()
+
+    def merge(self, records):
+        counts = {}
+        for record in records:
+            fingerprint = self.fingerprint(record)
+            n = counts.get(fingerprint, 0) + 1
+            counts[fingerprint] = n
+            if n > self.seen.get(fingerprint, 0):
+                yield record
+        for fingerprint, n in counts.items():
+            if n > self.seen.get(fingerprint, 0):
+                self.seen[fingerprint] = n
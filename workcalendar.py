@@ -0,0 +1,37 @@
+from datetime import timedelta as td
+
+
+class WorkCalendar:
+    """Working day calendar of one site.
+
+    Holidays, extra weekend days and extra working days are kept as sets of day ordinals. After index() is called for
+    the report window, lookups inside the window are a single bytearray access.
+    """
+
+    def __init__(self, name, holidays, weekends, workingdays):
+        self.name = name
+        self.holidays = set(d.toordinal() for d in holidays)
+        self.weekends = set(d.toordinal() for d in weekends)
+        self.workingdays = set(d.toordinal() for d in workingdays)
+        self._first = 0
+        self._days = bytearray()
+
+    def _compute(self, date) -> bool:
+        o = date.toordinal()
+        return ((date.weekday() < 5) and (o not in self.weekends) and (o not in self.holidays)) or (
+            o in self.workingdays
+        )
+
+    def index(self, min_date, max_date):
+        self._first = min_date.toordinal()
+        self._days = bytearray(max(0, max_date.toordinal() - self._first + 1))
+        date = min_date
+        for i in range(len(self._days)):
+            self._days[i] = self._compute(date)
+            date = date + td(days=1)
+
+    def is_working_day(self, date) -> bool:
+        i = date.toordinal() - self._first
+        if 0 <= i < len(self._days):
+            return self._days[i] == 1
+        return self._compute(date)